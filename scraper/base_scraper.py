@@ -1,16 +1,135 @@
 """
 ベーススクレイパークラス
-全スクレイパーの共通処理を提供
+全スクレイパーの共通処理と、セレクタ定義（specs/*.json）に基づく汎用抽出エンジンを提供
 """
+import json
 import os
 import re
 from datetime import datetime
-from typing import List, Dict
-from playwright.sync_api import sync_playwright
+from typing import List, Dict, Iterable, Iterator, Optional
+
+
+# 業者ごとのセレクタ定義ファイルの置き場所
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+# 行のテキストを一定件数ずつまとめて取得するスクリプト
+# 要素ハンドルをPython側に持ち出さず、必要なテキストだけを返す
+# [start, start + count) の要素を調べ、次の開始位置と全要素数を返す
+EXTRACT_ROWS_JS = """
+([rowSelector, rowContains, scope, fields, start, count]) => {
+    const root = scope ? document.querySelector(scope) : document;
+    if (!root) return {rows: [], next: null, total: 0};
+    const elements = root.querySelectorAll(rowSelector);
+    const needles = rowContains ? [].concat(rowContains) : [];
+    const matches = el => needles.every(needle => el.textContent.includes(needle));
+    const texts = (row, field) => field.selector
+        ? Array.from(row.querySelectorAll(field.selector), el => el.innerText.trim())
+        : row.innerText.split('\\n').map(line => line.trim()).filter(Boolean);
+    const rows = [];
+    const end = Math.min(start + count, elements.length);
+    for (let i = start; i < end; i++) {
+        const row = elements[i];
+        if (!matches(row)) continue;
+        rows.push(fields.map(field => texts(row, field)));
+    }
+    return {rows, next: end < elements.length ? end : null, total: elements.length};
+}
+"""
+
+# 1回のevaluateで調べる要素数の既定値
+DEFAULT_CHUNK_SIZE = 200
+
+# ブラウザ側のJSヒープ使用量（Chromiumのみ、取得できなければnull）
+JS_HEAP_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : null)"
+
+
+# 全角の数字・英字・カンマ・スペースを半角にする変換表（括弧や「～」はそのまま残す）
+FULLWIDTH_TABLE = {
+    **{code: code - 0xFEE0 for code in range(0xFF10, 0xFF1A)},  # ０-９
+    **{code: code - 0xFEE0 for code in range(0xFF21, 0xFF3B)},  # Ａ-Ｚ
+    **{code: code - 0xFEE0 for code in range(0xFF41, 0xFF5B)},  # ａ-ｚ
+    0xFF0C: ord(','),  # ，
+    0x3000: ord(' '),  # 全角スペース
+}
+
+# 容量（256GB, 1TBなど）
+STORAGE_PATTERN = re.compile(r'(\d+(?:GB|TB))')
+# 価格（数字+カンマ+円）
+PRICE_YEN_PATTERN = re.compile(r'([\d,]+)円')
+# 数字の塊（円がない場合の後方互換）
+NUMBER_PATTERN = re.compile(r'\d[\d,]*')
+
+
+def normalize_text(text: str) -> str:
+    """
+    全角の数字・英字・カンマ・スペースを半角に変換
+    """
+    return text.translate(FULLWIDTH_TABLE)
+
+
+def current_rss_kb() -> Optional[int]:
+    """
+    このプロセスの現在の常駐メモリ（VmRSS, KB）。/procがない環境ではNone
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def format_memory_stats(stats: Dict) -> str:
+    """
+    業者ごとのメモリ使用量を表示用の文字列にする
+    """
+    parts = []
+    if 'peak_rss_kb' in stats:
+        parts.append(f"最大RSS {stats['peak_rss_kb']:,}KB (+{stats['rss_growth_kb']:,}KB)")
+    if 'browser_heap_kb' in stats:
+        parts.append(f"ブラウザJSヒープ {stats['browser_heap_kb']:,}KB")
+    return " / ".join(parts) or "-"
+
+
+def load_spec(name: str, spec_dir: str = SPEC_DIR) -> Dict:
+    """
+    セレクタ定義ファイルを読み込む
+    
+    Args:
+        name: 業者名（specs/<name>.json）
+        spec_dir: 定義ファイルのディレクトリ
+        
+    Returns:
+        Dict: セレクタ定義
+    """
+    path = os.path.join(spec_dir, f"{name}.json")
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    
+    missing = [key for key in ('source', 'row_selector', 'model', 'prices') if key not in spec]
+    if 'url' not in spec and 'urls' not in spec:
+        missing.append('url')
+    if missing:
+        raise ValueError(f"{path}: 必須項目がありません: {', '.join(missing)}")
+    
+    return spec
 
 
 class BaseScraper:
-    def __init__(self, source: str, url: str, output_dir: str = "screenshots"):
+    def __init__(
+        self,
+        source: str = None,
+        url: str = None,
+        output_dir: str = "screenshots",
+        spec: Optional[Dict] = None
+    ):
         """
         ベーススクレイパーの初期化
         
@@ -18,11 +137,36 @@ class BaseScraper:
             source: 業者名（例: 'mobile_mix', 'iosys'）
             url: スクレイピング対象URL
             output_dir: スクリーンショット保存先ディレクトリ
+            spec: セレクタ定義（指定時はsource/urlを定義から取得）
         """
+        self.spec = spec
+        if spec is not None:
+            source = source or spec['source']
+            url = url or spec.get('url') or spec['urls'][0]
+        
         self.source = source
         self.url = url
+        self.urls = list(spec.get('urls') or [url]) if spec is not None else [url]
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        
+        # 直近の extract_prices の統計（行数・Python側のピークメモリ・ブラウザのJSヒープ）
+        self.stats: Dict = {}
+        
+        # enable_profiling() で設定（Noneならプロファイルしない）
+        self.profile_prefix: Optional[str] = None
+        self._profiling = False
+    
+    @classmethod
+    def from_spec(cls, name: str, output_dir: str = "screenshots") -> "BaseScraper":
+        """
+        セレクタ定義ファイルからスクレイパーを作成
+        
+        Args:
+            name: 業者名（specs/<name>.json）
+            output_dir: スクリーンショット保存先ディレクトリ
+        """
+        return cls(spec=load_spec(name), output_dir=output_dir)
     
     def parse_model_and_storage(self, text: str) -> tuple:
         """
@@ -34,8 +178,10 @@ class BaseScraper:
         Returns:
             tuple: (model_name, storage)
         """
+        text = normalize_text(text)
+        
         # 容量パターン（256GB, 1TBなど）
-        storage_match = re.search(r'(\d+(?:GB|TB))', text)
+        storage_match = STORAGE_PATTERN.search(text)
         if storage_match:
             storage = storage_match.group(1)
             # 容量部分を除いた残りがモデル名
@@ -51,26 +197,26 @@ class BaseScraper:
         価格テキストを数値に変換（複数価格がある場合は最初のみ）
         
         Args:
-            price_text: "203,000円" または "115,000円 108,000円" のようなテキスト
+            price_text: "203,000円" または "115,000円 108,000円" のようなテキスト（全角数字も可）
             
         Returns:
             int: 価格（円）
         """
+        price_text = normalize_text(price_text)
+        
         # 価格パターン（数字+カンマ+円）を検索
-        price_match = re.search(r'([\d,]+)円', price_text)
+        price_match = PRICE_YEN_PATTERN.search(price_text)
         if price_match:
             # 最初にマッチした価格のみを取得
-            price_str = price_match.group(1)
+            price_str = price_match.group(1).replace(',', '')
             # カンマを削除して数値に変換
-            return int(price_str.replace(',', ''))
+            if price_str:
+                return int(price_str)
         
-        # 円がない場合は数字とカンマのみ抽出（後方互換性）
-        price_str = re.sub(r'[^\d,]', '', price_text)
-        if price_str:
-            # 最初の数字の塊のみを取得
-            first_number = re.match(r'[\d,]+', price_str)
-            if first_number:
-                return int(first_number.group(0).replace(',', ''))
+        # 円がない場合は最初の数字の塊を取得（後方互換性）
+        first_number = NUMBER_PATTERN.search(price_text)
+        if first_number:
+            return int(first_number.group(0).replace(',', ''))
         
         return 0
     
@@ -107,34 +253,331 @@ class BaseScraper:
             'captured_at': captured_at.isoformat()
         }
     
+    @property
+    def screenshot_store(self):
+        """
+        スクリーンショットの保存先（同じ内容の再保存・容量上限を管理）
+        """
+        if getattr(self, '_screenshot_store', None) is None:
+            from screenshot_store import ScreenshotStore
+            self._screenshot_store = ScreenshotStore(self.output_dir)
+        return self._screenshot_store
+    
     def save_screenshot(self, page, suffix: str = "") -> str:
         """
-        スクリーンショットを保存
+        スクリーンショットを保存（前回と同じ内容なら前回のファイルを参照）
         
         Args:
             page: Playwrightのページオブジェクト
             suffix: ファイル名のサフィックス（オプション）
             
         Returns:
-            str: 保存したファイルパス
+            str: 保存した（または参照した）ファイルパス
+        """
+        data = page.screenshot(full_page=True)
+        return self.screenshot_store.save(self.source, data, suffix)
+    
+    def enable_profiling(self, enabled: bool = True) -> None:
+        """
+        extract_prices をcProfile・tracemallocで計測し、Playwrightトレースを保存する
+        （結果はスクリーンショット保存先の profiles/ に出力）
+        """
+        self._profiling = enabled
+    
+    def new_page(self, browser):
+        """
+        ブラウザに新しいコンテキストとページを作成
+        
+        Args:
+            browser: PlaywrightのBrowserオブジェクト
+            
+        Returns:
+            tuple: (context, page)
+        """
+        user_agent = (self.spec or {}).get('user_agent', DEFAULT_USER_AGENT)
+        context = browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent=user_agent
+        )
+        if self.profile_prefix:
+            context.tracing.start(screenshots=True, snapshots=True)
+        return context, context.new_page()
+    
+    def close_page(self, context, suffix: str = "") -> None:
+        """
+        コンテキストを閉じる（プロファイル中ならPlaywrightトレースを保存）
+        """
+        if self.profile_prefix:
+            trace_path = f"{self.profile_prefix}_trace{'_' + suffix if suffix else ''}.zip"
+            try:
+                context.tracing.stop(path=trace_path)
+                print(f"  Playwrightトレース保存: {trace_path}")
+            except Exception as e:
+                print(f"  ⚠ Playwrightトレースを保存できませんでした: {e}")
+        context.close()
+    
+    def open_page(self, page, url: str) -> None:
+        """
+        定義に従ってページを開き、価格が表示されるまで待機
+        
+        Args:
+            page: Playwrightのページオブジェクト
+            url: アクセスするURL
+        """
+        spec = self.spec
+        print(f"アクセス中: {url}")
+        # 既定はdomcontentloaded（networkidleはサイトによって終わらない）
+        page.goto(
+            url,
+            wait_until=spec.get('wait_until', 'domcontentloaded'),
+            timeout=spec.get('goto_timeout', 90000)
+        )
+        
+        # Cookie同意ボタンなどがあれば処理
+        for selector in spec.get('dismiss_selectors', []):
+            try:
+                if page.locator(selector).count() > 0:
+                    page.locator(selector).first.click()
+                    page.wait_for_timeout(1000)
+                    break
+            except Exception as e:
+                print(f"Cookie同意処理スキップ: {e}")
+                break
+        
+        if spec.get('wait_selector'):
+            page.wait_for_selector(spec['wait_selector'], timeout=spec.get('wait_timeout', 30000))
+        if spec.get('settle_ms'):
+            page.wait_for_timeout(spec['settle_ms'])
+    
+    def iter_rows(self, page, scope: Optional[str] = None) -> Iterator[List[List[str]]]:
+        """
+        定義の行セレクタに一致する要素から、各フィールドのテキストを一定件数ずつ取得
+        1回に保持するのは chunk_size 要素分のテキストのみで、要素ハンドルは作らない
+        
+        Args:
+            page: Playwrightのページオブジェクト
+            scope: 検索範囲を限定するセレクタ（省略時はページ全体）
+            
+        Yields:
+            List: 1行分の [機種名候補のテキスト, 価格フィールド1のテキスト, ...]
+        """
+        spec = self.spec
+        fields = [spec['model']] + list(spec['prices'])
+        chunk_size = spec.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        
+        start = 0
+        while start is not None:
+            chunk = page.evaluate(
+                EXTRACT_ROWS_JS,
+                [spec['row_selector'], spec.get('row_contains'), scope, fields, start, chunk_size]
+            )
+            self.stats['elements'] = self.stats.get('elements', 0) + (
+                min(chunk_size, chunk['total'] - start) if chunk['total'] else 0
+            )
+            self.stats['rows'] = self.stats.get('rows', 0) + len(chunk['rows'])
+            self._record_rss()
+            yield from chunk['rows']
+            start = chunk['next']
+        
+        self._record_browser_memory(page)
+    
+    def extract_rows(self, page, scope: Optional[str] = None) -> List[List[List[str]]]:
+        """
+        iter_rows() の結果をリストで取得
+        """
+        return list(self.iter_rows(page, scope))
+    
+    def _record_rss(self) -> None:
+        """
+        現在のRSSを取得し、この業者の実行中の最大値を記録
+        """
+        rss = current_rss_kb()
+        if rss is not None:
+            self.stats['peak_rss_kb'] = max(self.stats.get('peak_rss_kb', 0), rss)
+    
+    def _record_browser_memory(self, page) -> None:
+        """
+        ブラウザ側のJSヒープ使用量の最大値を記録
+        """
+        try:
+            heap = page.evaluate(JS_HEAP_JS)
+        except Exception:
+            return
+        if heap:
+            self.stats['browser_heap_kb'] = max(self.stats.get('browser_heap_kb', 0), heap // 1024)
+    
+    @staticmethod
+    def _pick_texts(field: Dict, texts: List[str], default_pick: str) -> List[tuple]:
+        """
+        フィールド定義に従ってテキスト候補を絞り込む
+        
+        Returns:
+            List[tuple]: (skip後の位置, テキスト) のリスト
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.source}_{timestamp}"
-        if suffix:
-            filename += f"_{suffix}"
-        filename += ".png"
+        candidates = list(enumerate(texts[field.get('skip', 0):]))
+        if field.get('contains'):
+            candidates = [(pos, text) for pos, text in candidates if field['contains'] in text]
         
-        screenshot_path = os.path.join(self.output_dir, filename)
-        page.screenshot(path=screenshot_path, full_page=True)
-        print(f"  スクリーンショット保存: {screenshot_path}")
+        pick = field.get('pick', default_pick)
+        if pick == 'first':
+            return candidates[:1]
+        if pick == 'last':
+            return candidates[-1:]
+        return candidates
+    
+    @staticmethod
+    def _condition(field: Dict, pos: int) -> Optional[str]:
+        """
+        価格フィールドの位置から状態（未使用品/中古品など）を決める
+        """
+        conditions = field.get('conditions', [])
+        if pos < len(conditions):
+            return conditions[pos]
+        return field.get('condition')
+    
+    def parse_rows(self, rows: Iterable[List[List[str]]], captured_at: datetime) -> List[Dict]:
+        """
+        iter_rows() / extract_rows() の結果を価格データに変換
         
-        return screenshot_path
+        Args:
+            rows: 行ごとのフィールドテキスト（イテレータなら取得しながら変換）
+            captured_at: 取得日時
+            
+        Returns:
+            List[Dict]: 価格情報のリスト
+        """
+        prices = []
+        price_fields = self.spec['prices']
+        
+        for row in rows:
+            models = self._pick_texts(self.spec['model'], row[0], 'first')
+            if not models:
+                continue
+            model_name, storage = self.parse_model_and_storage(models[0][1])
+            
+            for field, texts in zip(price_fields, row[1:]):
+                for pos, text in self._pick_texts(field, texts, 'all'):
+                    price = self.parse_price(text)
+                    if price <= 0:
+                        continue
+                    
+                    color_note = self._condition(field, pos)
+                    prices.append(self.create_price_data(
+                        model_name=model_name,
+                        storage=storage,
+                        price=price,
+                        color_note=color_note,
+                        captured_at=captured_at
+                    ))
+                    
+                    note = f" ({color_note})" if color_note else ""
+                    print(f"  ✓ {model_name} {storage}{note}: {price:,}円")
+        
+        return prices
+    
+    @staticmethod
+    def dedupe_prices(prices: List[Dict]) -> tuple:
+        """
+        (機種名, 容量, 状態) が同じ価格データを先勝ちで1件にまとめる
+        
+        Args:
+            prices: 価格情報のリスト
+            
+        Returns:
+            tuple: (重複を除いた価格情報のリスト, 除外した件数)
+        """
+        unique = {}
+        for price in prices:
+            key = (price['model_name'], price['storage'], price['color_note'])
+            unique.setdefault(key, price)
+        return list(unique.values()), len(prices) - len(unique)
+    
+    def scrape_url(self, browser, url: str, captured_at: datetime, suffix: str = "") -> List[Dict]:
+        """
+        1つのURLを開いて価格情報を抽出
+        
+        Args:
+            browser: PlaywrightのBrowserオブジェクト
+            url: 対象URL
+            captured_at: 取得日時
+            suffix: スクリーンショットのファイル名サフィックス
+            
+        Returns:
+            List[Dict]: 価格情報のリスト
+        """
+        context, page = self.new_page(browser)
+        try:
+            self.open_page(page, url)
+            
+            # スクリーンショットを保存
+            self.save_screenshot(page, suffix)
+            
+            print(f"\n価格情報を抽出中...")
+            prices = self.parse_rows(self.iter_rows(page), captured_at)
+            print(f"  ({self.stats.get('elements', 0)}要素 / {self.stats.get('rows', 0)}行を検出)")
+            
+            return prices
+        finally:
+            self.close_page(context, suffix)
     
-    def extract_prices(self) -> List[Dict]:
+    def extract_prices(self, browser=None) -> List[Dict]:
         """
-        価格情報を抽出（サブクラスでオーバーライド必須）
+        価格情報を抽出（セレクタ定義がない場合はサブクラスでオーバーライド必須）
         
+        Args:
+            browser: 起動済みのPlaywright Browser（省略時はこのメソッド内で起動・終了）
+            
         Returns:
             List[Dict]: 価格情報のリスト
         """
-        raise NotImplementedError("extract_prices() must be implemented in subclass")
+        if self.spec is None:
+            raise NotImplementedError("extract_prices() must be implemented in subclass")
+        
+        if browser is None:
+            # Playwrightは実際にスクレイピングする時点で読み込む
+            from playwright.sync_api import sync_playwright
+            
+            with sync_playwright() as p:
+                # Chromiumブラウザを起動
+                browser = p.chromium.launch(headless=True)
+                try:
+                    return self.extract_prices(browser)
+                finally:
+                    browser.close()
+        
+        if self._profiling and self.profile_prefix is None:
+            from profiling import profile_run
+            
+            with profile_run(self.source, self.output_dir) as prefix:
+                self.profile_prefix = prefix
+                try:
+                    return self.extract_prices(browser)
+                finally:
+                    self.profile_prefix = None
+        
+        prices = []
+        captured_at = datetime.now()
+        self.stats = {}
+        
+        # 業者の実行前後とチャンクごとに現在のRSSを取得し、その最大値を記録
+        # （getrusageの最大RSSはプロセス起動からの累計のため、業者ごとの比較に使えない）
+        rss_before = current_rss_kb()
+        self._record_rss()
+        
+        try:
+            for i, url in enumerate(self.urls):
+                suffix = str(i + 1) if len(self.urls) > 1 else ""
+                prices.extend(self.scrape_url(browser, url, captured_at, suffix))
+        except Exception as e:
+            print(f"エラー: {e}")
+            raise
+        finally:
+            self._record_rss()
+            if rss_before is not None and 'peak_rss_kb' in self.stats:
+                self.stats['rss_growth_kb'] = self.stats['peak_rss_kb'] - rss_before
+        
+        print(f"\n合計 {len(prices)}件の価格情報を抽出しました")
+        if 'peak_rss_kb' in self.stats or 'browser_heap_kb' in self.stats:
+            print(f"  メモリ: {format_memory_stats(self.stats)}")
+        
+        return prices
@@ -0,0 +1,321 @@
+"""
+パース処理のベンチマーク（処理速度と正解率）
+業者のページ・OCR結果に似た文字列を乱数で大量に生成し、
+parse_model_and_storage / parse_price / OCRProcessor.parse_prices の
+行/秒と正解率を計測して、ベースライン（bench_baseline.json）と比較する
+
+速度は実行環境で大きく変わるため、同じプロセスで計測した基準処理（REFERENCE）に対する比で比較する
+正解率がベースラインより下がるか、速度比が許容幅を超えて下がると終了コード1
+
+使用例:
+    python bench_parsing.py                      # ベースラインと比較
+    python bench_parsing.py --rows 50000 --repeat 10
+    python bench_parsing.py --update-baseline    # 現在の結果をベースラインとして保存
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from base_scraper import BaseScraper
+from ocr_processor import OCRProcessor
+
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# 速度比の許容幅（ベースラインの25%減まではOK。計測の揺れを吸収する）
+DEFAULT_TOLERANCE = 0.25
+
+# 乱数のシード（毎回同じコーパスを生成する）
+SEED = 20240110
+
+MODELS = [
+    "iPhone 17 Pro Max", "iPhone 17 Pro", "iPhone 17", "iPhone Air",
+    "iPhone 16 Pro Max", "iPhone 16 Pro", "iPhone 16 Plus", "iPhone 16", "iPhone 16e",
+    "iPhone 15 Pro Max", "iPhone 15 Pro", "iPhone 15 Plus", "iPhone 15",
+    "iPhone 14 Pro", "iPhone 14", "iPhone 13 mini", "iPhone 13", "iPhone SE 第3世代",
+]
+STORAGES = ["64GB", "128GB", "256GB", "512GB", "1TB", "2TB"]
+MODEL_SUFFIXES = ["", " SIMフリー", " 未開封", " (SIMフリー)", " 国内版", " A3101"]
+
+# 全角に変換する文字（normalize_text の逆）
+TO_FULLWIDTH = {
+    **{ord(c): ord(c) + 0xFEE0 for c in "0123456789"},
+    **{ord(c): ord(c) + 0xFEE0 for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"},
+    ord(","): 0xFF0C,
+    ord(" "): 0x3000,
+}
+
+
+def to_fullwidth(text: str) -> str:
+    return text.translate(TO_FULLWIDTH)
+
+
+def yen(price: int) -> str:
+    return f"{price:,}円"
+
+
+def random_price(rng: random.Random) -> int:
+    return rng.randrange(5_000, 300_000, 500)
+
+
+def model_case(rng: random.Random) -> Tuple[str, Tuple[str, str]]:
+    """
+    モデル名セルと期待値 (model_name, storage)
+    """
+    model = rng.choice(MODELS)
+    storage = rng.choice(STORAGES)
+    if rng.random() < 0.05:
+        # 容量の記載がないセルはモデル名がそのまま返る
+        text = model + rng.choice(MODEL_SUFFIXES)
+        return text, (text.strip(), "不明")
+    text = f"{model} {storage}{rng.choice(MODEL_SUFFIXES)}"
+    if rng.random() < 0.2:
+        text = to_fullwidth(text)
+    return text, (model, storage)
+
+
+def price_case(rng: random.Random) -> Tuple[str, int]:
+    """
+    価格セルと期待値（複数価格がある場合は最初の価格）
+    """
+    price = random_price(rng)
+    kind = rng.random()
+    if kind < 0.35:
+        text = yen(price)
+    elif kind < 0.5:
+        text = f"～{yen(price)}"
+    elif kind < 0.65:
+        # 未使用・中古など複数の価格が並ぶセル
+        others = " ".join(yen(random_price(rng)) for _ in range(rng.randint(1, 3)))
+        text = f"{yen(price)} {others}"
+    elif kind < 0.75:
+        text = f"買取上限 {yen(price)}"
+    elif kind < 0.85:
+        text = f"¥{price:,}"
+    else:
+        text = yen(price)
+    if rng.random() < 0.2:
+        text = to_fullwidth(text)
+    return text, price
+
+
+def ocr_case(rng: random.Random) -> Tuple[str, List[Tuple[str, str, int]]]:
+    """
+    OCR結果のテキスト（複数行）と期待値 [(model_name, storage, price)]
+    """
+    lines = ["iPhone 買取価格表", "※価格は税込です"]
+    expected = []
+    for _ in range(rng.randint(3, 8)):
+        model = rng.choice(MODELS)
+        storage = rng.choice(STORAGES)
+        price = random_price(rng)
+        line = f"{model} {storage} {yen(price)}"
+        if rng.random() < 0.2:
+            line = to_fullwidth(line)
+        lines.append(line)
+        expected.append((model, storage, price))
+    lines.append("更新日 2024/01/10")
+    return "\n".join(lines), expected
+
+
+# 基準処理で使う正規表現（パーサーの変更の影響を受けないよう独立に定義）
+REFERENCE_PATTERN = re.compile(r'\d+')
+
+
+def reference_parse(text: str) -> tuple:
+    """
+    速度比の分母にする基準処理（分割と正規表現1回。パーサーと同程度の文字列処理）
+    """
+    match = REFERENCE_PATTERN.search(text)
+    return len(text.split()), match.group(0) if match else None
+
+
+def build_corpus(rows: int, seed: int = SEED) -> Dict[str, List]:
+    """
+    ベンチマーク用のコーパスを生成（OCRは1テキストあたり複数行のため行数の1/5）
+    """
+    rng = random.Random(seed)
+    
+    return {
+        'model': [model_case(rng) for _ in range(rows)],
+        'price': [price_case(rng) for _ in range(rows)],
+        'ocr': [ocr_case(rng) for _ in range(max(1, rows // 5))],
+    }
+
+
+# 基準処理と交互に計測する1区間の件数（短い区間ごとに比を取り、一時的な負荷の影響を抑える）
+BLOCK_SIZE = 500
+
+
+def _timed(func: Callable, texts: List[str]) -> Tuple[float, List]:
+    # timeitと同じく、計測中はGCを止めて一時停止の影響を除く
+    # 時間はプロセスのCPU時間で測る（他のプロセスに割り込まれた時間を含めない）
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.process_time()
+        results = [func(text) for text in texts]
+        return time.process_time() - started, results
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def measure(func: Callable, cases: List, count: Callable, repeat: int) -> Dict:
+    """
+    全ケースを repeat 回処理し、行/秒・基準処理との速度比・正解率を返す
+    
+    速度比は BLOCK_SIZE 件ごとに基準処理と交互に計測した比の中央値
+    （同じ時点のCPUの状態で比べるため、マシンの速さや一時的な負荷に左右されにくい）
+    
+    Args:
+        func: ケースの入力を受け取り結果を返す関数
+        cases: (入力, 期待値) のリスト
+        count: (結果, 期待値) から (正解数, 行数) を返す関数
+        repeat: 繰り返し回数
+    """
+    texts = [text for text, _ in cases]
+    blocks = [texts[i:i + BLOCK_SIZE] for i in range(0, len(texts), BLOCK_SIZE)]
+    best = None
+    ratios = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        results = []
+        for block in blocks:
+            reference_elapsed, _ = _timed(reference_parse, block)
+            block_elapsed, block_results = _timed(func, block)
+            elapsed += block_elapsed
+            results.extend(block_results)
+            if block_elapsed:
+                ratios.append(reference_elapsed / block_elapsed)
+        best = elapsed if best is None else min(best, elapsed)
+    
+    correct = 0
+    total = 0
+    for result, (_, expected) in zip(results, cases):
+        ok, rows = count(result, expected)
+        correct += ok
+        total += rows
+    
+    return {
+        'rows': total,
+        'rows_per_sec': round(total / best) if best else 0,
+        # 基準処理にかかる時間との比。大きいほど速い
+        'relative': round(statistics.median(ratios), 4) if ratios else 0.0,
+        'accuracy': round(correct / total, 4) if total else 0.0,
+    }
+
+
+def count_exact(result, expected) -> Tuple[int, int]:
+    return int(result == expected), 1
+
+
+def count_ocr(result: List[Dict], expected: List[Tuple[str, str, int]]) -> Tuple[int, int]:
+    got = [(p['model_name'], p['storage'], p['price']) for p in result]
+    correct = sum(1 for g, e in zip(got, expected) if g == e)
+    # 余分に抽出した行は不正解として数える
+    return correct, max(len(got), len(expected))
+
+
+def run_benchmark(rows: int, repeat: int) -> Dict[str, Dict]:
+    """
+    3つのパーサーを計測
+    """
+    corpus = build_corpus(rows)
+    # パース処理はブラウザ・specsを使わないため、初期化せずにメソッドだけ使う
+    scraper = BaseScraper.__new__(BaseScraper)
+    ocr = OCRProcessor()
+    captured_at = datetime(2024, 1, 10, 12, 0, 0)
+    
+    return {
+        'parse_model_and_storage': measure(scraper.parse_model_and_storage, corpus['model'], count_exact, repeat),
+        'parse_price': measure(scraper.parse_price, corpus['price'], count_exact, repeat),
+        'ocr_parse_prices': measure(lambda text: ocr.parse_prices(text, captured_at), corpus['ocr'], count_ocr, repeat),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    ベースラインと比較し、悪化した項目のメッセージを返す
+    """
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['accuracy'] < base['accuracy']:
+            failures.append(f"{name}: 正解率 {result['accuracy']:.2%} < ベースライン {base['accuracy']:.2%}")
+        if 'relative' not in base:
+            continue
+        floor = base['relative'] * (1 - tolerance)
+        if result['relative'] < floor:
+            failures.append(
+                f"{name}: 速度比 {result['relative']:.3f} < ベースライン {base['relative']:.3f}"
+                f"の{1 - tolerance:.0%}"
+            )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="パース処理の速度・正解率のベンチマーク")
+    parser.add_argument("--rows", type=int, default=20000, help="生成する行数（既定: 20000）")
+    parser.add_argument("--repeat", type=int, default=5, help="繰り返し回数（最速の回を採用、既定: 5）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="ベースラインのファイル")
+    parser.add_argument("--update-baseline", action="store_true", help="現在の結果をベースラインとして保存")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="速度比の低下の許容幅（既定: 0.25 = 25%%）")
+    args = parser.parse_args()
+    
+    results = run_benchmark(args.rows, max(1, args.repeat))
+    
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get('results', {})
+    
+    print(f"{'パーサー':<26}{'行数':>8}{'行/秒':>12}{'速度比':>9}{'正解率':>9}{'ベースライン比':>14}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        ratio = f"{result['relative'] / base['relative']:.2f}x" if base and 'relative' in base else "-"
+        print(
+            f"{name:<26}{result['rows']:>8,}{result['rows_per_sec']:>12,}{result['relative']:>9.3f}"
+            f"{result['accuracy']:>9.2%}{ratio:>14}"
+        )
+    
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'rows': args.rows,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nベースラインを保存しました: {args.baseline}")
+        return 0
+    
+    if not baseline:
+        print(f"\nベースラインがありません（--update-baseline で作成）: {args.baseline}")
+        return 0
+    
+    failures = compare(results, baseline, args.tolerance)
+    if failures:
+        print("\n✗ ベースラインより悪化しました:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    
+    print("\n✓ ベースライン以内です")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
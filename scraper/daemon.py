@@ -0,0 +1,330 @@
+"""
+常駐モード: ブラウザを起動したまま、業者ごとの間隔で定期的にスクレイピング → DB保存
+
+- ブラウザは1回起動して使い回す（一定回数ごと・切断時に再起動）
+- 業者ごとに実行間隔（specsの interval_minutes または --interval）とジッターを設定
+- /health と /metrics をローカルHTTPで公開
+
+使用例:
+    python main.py --daemon --interval 60 --port 8080
+"""
+import json
+import random
+import signal
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional
+from registry import get_label, load_scraper
+
+
+class BrowserPool:
+    """
+    起動済みのChromiumを保持し、ジョブごとに貸し出す
+    Playwrightの同期APIはスレッドをまたげないため、スケジューラと同じスレッドから使う
+    """
+    
+    def __init__(self, recycle_after: int = 50):
+        """
+        Args:
+            recycle_after: このジョブ数ごとにブラウザを再起動（メモリ肥大化対策）
+        """
+        self.recycle_after = recycle_after
+        self._playwright = None
+        self._browser = None
+        self._jobs = 0
+        self.launch_count = 0
+    
+    def get(self):
+        """
+        起動済みのブラウザを返す（未起動・切断・再起動時期なら起動し直す）
+        """
+        if self._browser is not None and (
+            not self._browser.is_connected() or self._jobs >= self.recycle_after
+        ):
+            self._close_browser()
+        
+        if self._browser is None:
+            if self._playwright is None:
+                # Playwrightは実際にスクレイピングする時点で読み込む
+                from playwright.sync_api import sync_playwright
+                self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True)
+            self._jobs = 0
+            self.launch_count += 1
+            print("ブラウザを起動しました")
+        
+        self._jobs += 1
+        return self._browser
+    
+    def _close_browser(self) -> None:
+        try:
+            self._browser.close()
+        except Exception as e:
+            print(f"ブラウザ終了エラー: {e}")
+        self._browser = None
+    
+    def close(self) -> None:
+        """
+        ブラウザとPlaywrightを終了
+        """
+        if self._browser is not None:
+            self._close_browser()
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+
+class DaemonState:
+    """
+    業者ごとの実行状況（HTTPスレッドから参照するためロックで保護）
+    """
+    
+    def __init__(self, sources: List[str], grace_seconds: float = 0):
+        """
+        Args:
+            sources: 実行対象の業者名
+            grace_seconds: 実行間隔に加えて、成功していなくても正常とみなす猶予（ジッター分）
+        """
+        self.started_at = time.time()
+        self.grace_seconds = grace_seconds
+        self._lock = threading.Lock()
+        self._vendors = {
+            source: {
+                'runs': 0,
+                'errors': 0,
+                'rows': 0,
+                'last_status': None,
+                'last_run_at': None,
+                'last_success_at': None,
+                'last_duration': None,
+                'next_run_at': None,
+                'interval_seconds': None,
+            }
+            for source in sources
+        }
+    
+    def update(self, source: str, **values) -> None:
+        with self._lock:
+            self._vendors[source].update(values)
+    
+    def record_run(self, source: str, ok: bool, rows: int, duration: float) -> None:
+        now = time.time()
+        with self._lock:
+            vendor = self._vendors[source]
+            vendor['runs'] += 1
+            vendor['rows'] += rows
+            vendor['last_status'] = 'ok' if ok else 'error'
+            vendor['last_run_at'] = now
+            vendor['last_duration'] = duration
+            if ok:
+                vendor['last_success_at'] = now
+            else:
+                vendor['errors'] += 1
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {source: dict(values) for source, values in self._vendors.items()}
+    
+    def health(self) -> str:
+        """
+        全体の状態を返す
+        
+        Returns:
+            str: 'ok'（全業者が実行間隔内に成功）、'degraded'（一部が失敗・停滞）、'failed'（成功している業者がない）
+        """
+        now = time.time()
+        vendors = self.snapshot()
+        healthy = 0
+        for vendor in vendors.values():
+            if vendor['interval_seconds'] is None:
+                healthy += 1
+                continue
+            # 実行間隔＋ジッター＋前回の所要時間以内に成功していれば正常
+            # （まだ成功していない業者は起動時刻から数える）
+            window = vendor['interval_seconds'] + self.grace_seconds + (vendor['last_duration'] or 0)
+            if now - (vendor['last_success_at'] or self.started_at) <= window:
+                healthy += 1
+        
+        if healthy == len(vendors):
+            return 'ok'
+        return 'degraded' if healthy else 'failed'
+
+
+def render_metrics(state: DaemonState) -> str:
+    """
+    Prometheus形式のメトリクスを生成
+    """
+    lines = [
+        "# TYPE scraper_uptime_seconds gauge",
+        f"scraper_uptime_seconds {time.time() - state.started_at:.0f}",
+        "# TYPE scraper_runs_total counter",
+        "# TYPE scraper_errors_total counter",
+        "# TYPE scraper_rows_total counter",
+        "# TYPE scraper_last_duration_seconds gauge",
+        "# TYPE scraper_last_success_timestamp_seconds gauge",
+        "# TYPE scraper_peak_rss_bytes gauge",
+        "# TYPE scraper_browser_heap_bytes gauge",
+    ]
+    for source, vendor in state.snapshot().items():
+        label = f'{{source="{source}"}}'
+        lines.append(f"scraper_runs_total{label} {vendor['runs']}")
+        lines.append(f"scraper_errors_total{label} {vendor['errors']}")
+        lines.append(f"scraper_rows_total{label} {vendor['rows']}")
+        if vendor['last_duration'] is not None:
+            lines.append(f"scraper_last_duration_seconds{label} {vendor['last_duration']:.2f}")
+        if vendor['last_success_at'] is not None:
+            lines.append(f"scraper_last_success_timestamp_seconds{label} {vendor['last_success_at']:.0f}")
+        if vendor.get('peak_rss_kb') is not None:
+            lines.append(f"scraper_peak_rss_bytes{label} {vendor['peak_rss_kb'] * 1024}")
+        if vendor.get('browser_heap_kb') is not None:
+            lines.append(f"scraper_browser_heap_bytes{label} {vendor['browser_heap_kb'] * 1024}")
+    return "\n".join(lines) + "\n"
+
+
+def start_health_server(state: DaemonState, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    /health（JSON）と /metrics（Prometheus形式）を返すHTTPサーバーを別スレッドで起動
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = 200
+            if self.path == '/health':
+                health = state.health()
+                # 成功している業者がなければ503（外部の監視で検知できるようにする）
+                status = 503 if health == 'failed' else 200
+                body = json.dumps({
+                    'status': health,
+                    'uptime_seconds': round(time.time() - state.started_at),
+                    'vendors': state.snapshot(),
+                }, ensure_ascii=False).encode('utf-8')
+                content_type = 'application/json; charset=utf-8'
+            elif self.path == '/metrics':
+                body = render_metrics(state).encode('utf-8')
+                content_type = 'text/plain; version=0.0.4'
+            else:
+                self.send_error(404)
+                return
+            
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            # アクセスログは出力しない
+            pass
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"ヘルスチェック: http://{host}:{port}/health, メトリクス: /metrics")
+    return server
+
+
+def vendor_interval(scraper, default_minutes: float) -> float:
+    """
+    業者の実行間隔（秒）。specsの interval_minutes を優先
+    """
+    spec = getattr(scraper, 'spec', None) or {}
+    return float(spec.get('interval_minutes', default_minutes)) * 60
+
+
+def run_daemon(
+    sources: List[str],
+    interval_minutes: float = 60,
+    jitter_seconds: float = 120,
+    port: Optional[int] = 8080,
+    host: str = "127.0.0.1",
+    recycle_after: int = 50
+) -> int:
+    """
+    常駐してスクレイピングを繰り返す（SIGTERM/SIGINTで終了）
+    
+    Args:
+        sources: 実行対象の業者名
+        interval_minutes: specsに interval_minutes がない業者の実行間隔（分）
+        jitter_seconds: 実行時刻に加えるランダムな揺らぎの最大秒数
+        port: ヘルスチェック用のポート（Noneなら起動しない）
+        host: ヘルスチェックの待ち受けアドレス（既定はローカルのみ）
+        recycle_after: ブラウザを再起動するまでのジョブ数
+    
+    Returns:
+        int: 終了コード
+    """
+    stop = threading.Event()
+    
+    def handle_signal(signum, frame):
+        print(f"\nシグナル {signum} を受信しました。終了します...")
+        stop.set()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    state = DaemonState(sources, grace_seconds=jitter_seconds)
+    server = start_health_server(state, port, host) if port else None
+    pool = BrowserPool(recycle_after=recycle_after)
+    scrapers = {source: load_scraper(source) for source in sources}
+    db_client = None
+    
+    # 起動直後は業者ごとに少しずらして実行
+    now = time.time()
+    next_run = {source: now + random.uniform(0, jitter_seconds) for source in sources}
+    
+    print("=" * 60)
+    print(f"ResaleTracker - 常駐モード（{len(sources)}社）")
+    for source in sources:
+        interval = vendor_interval(scrapers[source], interval_minutes)
+        state.update(source, interval_seconds=interval)
+        print(f"  {get_label(source)}: {interval / 60:g}分ごと")
+    print("=" * 60)
+    
+    try:
+        while not stop.is_set():
+            source = min(next_run, key=next_run.get)
+            wait = next_run[source] - time.time()
+            if wait > 0:
+                stop.wait(wait)
+                continue
+            
+            name = get_label(source)
+            started = time.time()
+            print(f"\n[{datetime.now():%Y-%m-%d %H:%M:%S}] {name} - 価格情報を抽出中...")
+            
+            ok = False
+            rows = 0
+            try:
+                prices = scrapers[source].extract_prices(pool.get())
+                if prices:
+                    if db_client is None:
+                        from db_client import SupabaseClient
+                        db_client = SupabaseClient()
+                    rows = db_client.save_prices(prices)
+                    ok = True
+                else:
+                    print(f"⚠ {name}: 価格情報が抽出できませんでした")
+            except Exception as e:
+                print(f"✗ {name}でエラーが発生しました: {e}")
+            
+            duration = time.time() - started
+            state.record_run(source, ok, rows, duration)
+            stats = scrapers[source].stats
+            state.update(
+                source,
+                peak_rss_kb=stats.get('peak_rss_kb'),
+                browser_heap_kb=stats.get('browser_heap_kb')
+            )
+            
+            interval = vendor_interval(scrapers[source], interval_minutes)
+            delay = max(interval + random.uniform(-jitter_seconds, jitter_seconds), 60)
+            next_run[source] = time.time() + delay
+            state.update(source, next_run_at=next_run[source])
+            print(f"  {duration:.1f}秒 / 次回: {datetime.fromtimestamp(next_run[source]):%H:%M:%S}")
+    finally:
+        pool.close()
+        if server is not None:
+            server.shutdown()
+    
+    return 0
@@ -1,26 +1,354 @@
 """
 Supabaseデータベースクライアント
+
+supabase SDK（auth/storage/realtimeを含む）の代わりに、PostgREST（/rest/v1）へ直接アクセスする
+軽量なクライアントを使う。HTTPセッションは最初のリクエスト時に作成し、keep-aliveで使い回す。
 """
+import json
 import os
-from typing import List, Dict
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Iterator, Optional, Union
+
+
+# 1日1件/キーの判定は日本時間の日付で行う
+JST = timezone(timedelta(hours=9))
+
+# price_historyの自然キー（migration_price_history_dedupe.sql の一意制約と同じ並び）
+PRICE_KEY_COLUMNS = ('source', 'model_name', 'storage', 'color_note', 'captured_date')
+
+# 価格変動イベントの比較に使う直近価格のキャッシュ（環境変数 PRICE_CACHE_PATH で変更可能）
+DEFAULT_PRICE_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.cache', 'last_prices.json'
+)
+
+# キャッシュがない場合にDBから直近価格を読み込む日数
+PRICE_CACHE_SEED_DAYS = 14
+
+# price_change_events.change_pct（NUMERIC(12, 2)）に収まる変動率の上限（絶対値）
+CHANGE_PCT_LIMIT = 10 ** 10
+
+
+def _to_datetime(captured_at: Union[str, datetime]) -> datetime:
+    """
+    取得日時をタイムゾーン付きのdatetimeに変換（タイムゾーンなしはローカル時刻とみなす）
+    """
+    if isinstance(captured_at, str):
+        captured_at = datetime.fromisoformat(captured_at.replace('Z', '+00:00'))
+    return captured_at.astimezone()
+
+
+def _change_pct(change: Optional[int], old_price: Optional[int]) -> Optional[float]:
+    """
+    変動率（%）を求める。列に収まらない値（誤読した1円からの変動など）はNULLにする
+    """
+    if change is None or not old_price:
+        return None
+    pct = round(change * 100 / old_price, 2)
+    return pct if abs(pct) < CHANGE_PCT_LIMIT else None
+
+
+def captured_day(captured_at: Union[str, datetime]) -> str:
+    """
+    取得日時から日本時間の日付（YYYY-MM-DD）を求める
+    
+    Args:
+        captured_at: ISO形式の文字列またはdatetime（タイムゾーンなしはローカル時刻とみなす）
+        
+    Returns:
+        str: 日付
+    """
+    return _to_datetime(captured_at).astimezone(JST).date().isoformat()
+
+
+def series_key(price: Dict) -> str:
+    """
+    価格の系列キー (source, model_name, storage, color_note) を文字列で返す（日付を含まない）
+    """
+    return '\t'.join(price.get(column) or '' for column in ('source', 'model_name', 'storage', 'color_note'))
+
+
+def price_key(price: Dict) -> tuple:
+    """
+    価格データの自然キー (source, model_name, storage, color_note, captured_date) を返す
+    """
+    captured_date = price.get('captured_date') or captured_day(price['captured_at'])
+    return (
+        price.get('source'),
+        price.get('model_name'),
+        price.get('storage'),
+        price.get('color_note'),
+        captured_date
+    )
+
+
+class PostgrestError(Exception):
+    """
+    PostgRESTがエラーを返した場合の例外
+    """
+    
+    def __init__(self, status_code: int, message: str, details: Optional[Dict] = None):
+        super().__init__(f"[{status_code}] {message}")
+        self.status_code = status_code
+        self.details = details or {}
+
+
+class PostgrestResponse:
+    """
+    クエリ結果（supabase SDKと同じく .data で参照）
+    """
+    
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _format_value(value) -> str:
+    """
+    フィルタ値をPostgRESTの表記に変換
+    """
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _quote_value(value) -> str:
+    """
+    or=(...) などの論理式内の値をダブルクォートで囲む（日時の「:」「.」を含むため）
+    """
+    text = _format_value(value)
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _format_list_value(value) -> str:
+    """
+    in.(...) 内の値を変換（カンマ・括弧・引用符を含む値はダブルクォートで囲む）
+    """
+    text = _format_value(value)
+    if any(c in text for c in ',()"\\ '):
+        text = '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+
+class QueryBuilder:
+    """
+    PostgRESTのクエリを組み立てる（supabase SDKのうち、このパッケージで使う部分のみ）
+    """
+    
+    def __init__(self, client: "PostgrestClient", path: str):
+        self._client = client
+        self._path = path
+        self._method = 'GET'
+        self._params: List[tuple] = []
+        self._orders: List[str] = []
+        self._json = None
+        self._prefer: List[str] = []
+    
+    # --- 取得・変更の種類 ---
+    
+    def select(self, columns: str = '*') -> "QueryBuilder":
+        self._params.append(('select', columns))
+        return self
+    
+    def insert(self, rows: Union[Dict, List[Dict]]) -> "QueryBuilder":
+        self._method = 'POST'
+        self._json = rows
+        self._prefer.append('return=representation')
+        return self
+    
+    def upsert(self, rows: Union[Dict, List[Dict]], on_conflict: str = '') -> "QueryBuilder":
+        self._method = 'POST'
+        self._json = rows
+        if on_conflict:
+            self._params.append(('on_conflict', on_conflict))
+        self._prefer.extend(['resolution=merge-duplicates', 'return=representation'])
+        return self
+    
+    def delete(self) -> "QueryBuilder":
+        self._method = 'DELETE'
+        self._prefer.append('return=minimal')
+        return self
+    
+    # --- フィルタ ---
+    
+    def _filter(self, column: str, operator: str, value) -> "QueryBuilder":
+        self._params.append((column, f"{operator}.{_format_value(value)}"))
+        return self
+    
+    def eq(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, 'eq', value)
+    
+    def neq(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, 'neq', value)
+    
+    def gt(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, 'gt', value)
+    
+    def gte(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, 'gte', value)
+    
+    def lt(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, 'lt', value)
+    
+    def lte(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, 'lte', value)
+    
+    def in_(self, column: str, values) -> "QueryBuilder":
+        joined = ','.join(_format_list_value(v) for v in values)
+        self._params.append((column, f"in.({joined})"))
+        return self
+    
+    def or_(self, expression: str) -> "QueryBuilder":
+        """
+        例: or_("captured_at.lt.2026-01-01,and(captured_at.eq.2026-01-01,id.lt.xxx)")
+        """
+        self._params.append(('or', f"({expression})"))
+        return self
+    
+    # --- 並び順・件数 ---
+    
+    def order(self, column: str, desc: bool = False) -> "QueryBuilder":
+        self._orders.append(f"{column}.{'desc' if desc else 'asc'}")
+        return self
+    
+    def limit(self, count: int) -> "QueryBuilder":
+        self._params.append(('limit', count))
+        return self
+    
+    def range(self, start: int, end: int) -> "QueryBuilder":
+        self._params.append(('offset', start))
+        self._params.append(('limit', end - start + 1))
+        return self
+    
+    def execute(self) -> PostgrestResponse:
+        params = list(self._params)
+        if self._orders:
+            params.append(('order', ','.join(self._orders)))
+        headers = {'Prefer': ','.join(self._prefer)} if self._prefer else {}
+        return self._client.request(self._method, self._path, params, self._json, headers)
+
+
+class PostgrestClient:
+    """
+    PostgREST（Supabaseの /rest/v1）への軽量クライアント
+    httpxのセッションは最初のリクエスト時に作成し、接続をkeep-aliveで使い回す
+    """
+    
+    def __init__(self, url: str, key: str, timeout: float = 30.0, max_connections: int = 10):
+        self.base_url = url.rstrip('/') + '/rest/v1'
+        self.key = key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session = None
+    
+    @property
+    def session(self):
+        if self._session is None:
+            # httpxは最初のリクエスト時に読み込む
+            import httpx
+            
+            self._session = httpx.Client(
+                base_url=self.base_url,
+                headers={
+                    'apikey': self.key,
+                    'Authorization': f"Bearer {self.key}",
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json',
+                },
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60
+                )
+            )
+        return self._session
+    
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, f"/{name}")
+    
+    def rpc(self, name: str, params: Optional[Dict] = None) -> QueryBuilder:
+        builder = QueryBuilder(self, f"/rpc/{name}")
+        builder._method = 'POST'
+        builder._json = params or {}
+        return builder
+    
+    def request(self, method: str, path: str, params=None, json=None, headers=None) -> PostgrestResponse:
+        """
+        リクエストを送信し、エラー時は PostgrestError を送出
+        """
+        response = self.session.request(method, path, params=params, json=json, headers=headers)
+        
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {'message': response.text}
+            raise PostgrestError(response.status_code, body.get('message', response.text), body)
+        
+        if not response.content:
+            return PostgrestResponse([])
+        return PostgrestResponse(response.json())
+    
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
 
 class SupabaseClient:
-    def __init__(self):
-        # 環境変数を読み込み
-        load_dotenv()
+    def __init__(self, url: str = None, key: str = None):
+        """
+        Args:
+            url: SupabaseのURL（省略時は環境変数 SUPABASE_URL）
+            key: SupabaseのAPIキー（省略時は環境変数 SUPABASE_KEY）
+        """
+        supabase_url = url or os.getenv('SUPABASE_URL')
+        supabase_key = key or os.getenv('SUPABASE_KEY')
         
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_KEY')
+        if not supabase_url or not supabase_key:
+            # 環境変数にない場合のみ.envファイルを読み込む
+            from dotenv import load_dotenv
+            load_dotenv()
+            supabase_url = supabase_url or os.getenv('SUPABASE_URL')
+            supabase_key = supabase_key or os.getenv('SUPABASE_KEY')
         
         if not supabase_url or not supabase_key:
             raise ValueError("SUPABASE_URLとSUPABASE_KEYを.envファイルに設定してください")
         
-        # Supabaseクライアントを作成
-        self.client: Client = create_client(supabase_url, supabase_key)
-        print("Supabase接続完了")
+        self._url = supabase_url
+        self._key = supabase_key
+        self._client: Optional[PostgrestClient] = None
+        
+        self.price_cache_path = os.getenv('PRICE_CACHE_PATH', DEFAULT_PRICE_CACHE_PATH)
+        self._last_prices: Optional[Dict[str, list]] = None
+        # 直近のsave_pricesで検出した価格変動イベント
+        self.last_events: List[Dict] = []
+    
+    @property
+    def client(self) -> PostgrestClient:
+        """
+        PostgRESTクライアント（最初に使う時点で作成）
+        """
+        if self._client is None:
+            self._client = PostgrestClient(self._url, self._key)
+        return self._client
+    
+    def close(self) -> None:
+        """
+        HTTPセッションを閉じる
+        """
+        if self._client is not None:
+            self._client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
     def save_prices(self, prices: List[Dict]) -> int:
         """
@@ -36,32 +364,380 @@ class SupabaseClient:
             print("保存する価格情報がありません")
             return 0
         
+        # 同じキーは後勝ちで1件にまとめる（1回のupsert内で同じ行を2回更新できないため）
+        rows = {}
+        for price in prices:
+            row = dict(price)
+            row['captured_date'] = row.get('captured_date') or captured_day(row['captured_at'])
+            rows[price_key(row)] = row
+        
+        merged = len(prices) - len(rows)
+        if merged:
+            print(f"同じキーの価格情報を{merged}件まとめました")
+        
+        # 保存前に直近価格と比べて変動イベントを作成
+        # 直近価格を読み込めなかった場合は全件が「新規」になるため、イベントもキャッシュも更新しない
+        last_prices = self.load_last_prices()
+        if last_prices is None:
+            events, updated_prices = [], {}
+        else:
+            events, updated_prices = self.compute_price_events(rows.values(), last_prices)
+        
         try:
-            # price_historyテーブルに挿入
-            response = self.client.table('price_history').insert(prices).execute()
+            # price_historyテーブルにupsert（同日の同じキーは価格を上書き）
+            response = self.client.table('price_history')\
+                .upsert(list(rows.values()), on_conflict=','.join(PRICE_KEY_COLUMNS))\
+                .execute()
             
             saved_count = len(response.data) if response.data else 0
             print(f"Supabaseに{saved_count}件の価格情報を保存しました")
             
-            return saved_count
-            
         except Exception as e:
             print(f"データベース保存エラー: {e}")
             raise
+        
+        self.last_events = events
+        try:
+            self.save_price_events(events)
+        except Exception as e:
+            # キャッシュを進めなければ、次回の保存で同じ変動を再検出できる
+            print(f"⚠ 価格変動イベントの保存に失敗しました（次回に再検出します）: {e}")
+            return saved_count
+        
+        # イベントの保存に成功してから直近価格のキャッシュを進める
+        if last_prices is not None and updated_prices:
+            last_prices.update(updated_prices)
+            self.save_last_prices()
+        
+        return saved_count
+    
+    def load_last_prices(self) -> Optional[Dict[str, list]]:
+        """
+        系列キーごとの直近価格 {series_key: [price, captured_at]} を読み込む
+        ローカルのキャッシュがなければ、DBの直近の履歴から作成する
+        
+        Returns:
+            Optional[Dict[str, list]]: 直近価格（DBから読み込めなかった場合はNone。次回の呼び出しで再試行する）
+        """
+        if self._last_prices is not None:
+            return self._last_prices
+        
+        try:
+            with open(self.price_cache_path, encoding='utf-8') as f:
+                self._last_prices = json.load(f)
+            return self._last_prices
+        except (FileNotFoundError, ValueError):
+            pass
+        
+        print(f"直近価格のキャッシュがないため、過去{PRICE_CACHE_SEED_DAYS}日分の履歴から作成します")
+        since = (datetime.now(timezone.utc) - timedelta(days=PRICE_CACHE_SEED_DAYS)).isoformat()
+        last_prices = {}
+        try:
+            rows = self.iter_price_history(
+                columns=['source', 'model_name', 'storage', 'color_note', 'price', 'captured_at'],
+                desc=False,
+                since=since
+            )
+            for row in rows:
+                last_prices[series_key(row)] = [row['price'], row['captured_at']]
+        except Exception as e:
+            # 途中までの直近価格は保持しない（キャッシュに書き出すと以後「新規」が誤検出され続ける）
+            print(f"⚠ 直近価格の読み込みに失敗しました（今回は価格変動を記録しません）: {e}")
+            return None
+        
+        self._last_prices = last_prices
+        return last_prices
+    
+    def save_last_prices(self) -> None:
+        """
+        直近価格のキャッシュを書き出す
+        """
+        if self._last_prices is None:
+            return
+        
+        try:
+            os.makedirs(os.path.dirname(self.price_cache_path) or '.', exist_ok=True)
+            tmp_path = self.price_cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._last_prices, f, ensure_ascii=False)
+            os.replace(tmp_path, self.price_cache_path)
+        except OSError as e:
+            print(f"⚠ 直近価格のキャッシュを保存できませんでした: {e}")
+    
+    @staticmethod
+    def compute_price_events(rows, last_prices: Dict[str, list]) -> tuple:
+        """
+        直近価格と比べて価格変動イベントを作成
+        
+        Args:
+            rows: 保存する価格情報
+            last_prices: 系列キーごとの直近価格 {series_key: [price, captured_at]}
+            
+        Returns:
+            tuple: (イベントのリスト, キャッシュに反映する {series_key: [price, captured_at]})
+        """
+        events = []
+        updated = {}
+        
+        for row in rows:
+            key = series_key(row)
+            previous = updated.get(key) or last_prices.get(key)
+            captured_at = _to_datetime(row['captured_at'])
+            
+            # 既に新しい価格を記録済みなら比較しない（古いデータの再保存など）
+            if previous and _to_datetime(previous[1]) >= captured_at:
+                continue
+            
+            updated[key] = [row['price'], row['captured_at']]
+            old_price = previous[0] if previous else None
+            if old_price == row['price']:
+                continue
+            
+            change = row['price'] - old_price if old_price is not None else None
+            events.append({
+                'source': row['source'],
+                'model_name': row['model_name'],
+                'storage': row['storage'],
+                'color_note': row.get('color_note'),
+                'old_price': old_price,
+                'new_price': row['price'],
+                'change': change,
+                'change_pct': _change_pct(change, old_price),
+                'captured_at': row['captured_at'],
+            })
+        
+        return events, updated
+    
+    def save_price_events(self, events: List[Dict]) -> int:
+        """
+        価格変動イベントをprice_change_eventsテーブルに保存
+        
+        Returns:
+            int: 保存した件数
+        
+        Raises:
+            Exception: 保存に失敗した場合（呼び出し元は直近価格のキャッシュを進めない）
+        """
+        if not events:
+            print("価格変動: なし")
+            return 0
+        
+        new_count = sum(1 for event in events if event['old_price'] is None)
+        print(f"価格変動: {len(events) - new_count}件 / 新規: {new_count}件")
+        
+        self.client.table('price_change_events').insert(events).execute()
+        return len(events)
+    
+    def compact_duplicates(self, page_size: int = 1000, batch_size: int = 200, dry_run: bool = False) -> int:
+        """
+        過去データの重複（同日の同じキー）を削除し、各キーの最新の1件だけを残す
+        
+        Args:
+            page_size: 読み込み時の1ページの件数
+            batch_size: 1回のDELETEで削除する件数
+            dry_run: Trueなら件数を数えるだけで削除しない
+            
+        Returns:
+            int: 削除した（dry_runなら削除対象の）件数
+        """
+        columns = ['id', 'source', 'model_name', 'storage', 'color_note', 'captured_at']
+        latest = {}
+        duplicate_ids = []
+        scanned = 0
+        
+        # 取得日時の昇順に全件を走査し、同じキーの古い行を削除対象にする
+        for row in self.iter_price_history(columns=columns, page_size=page_size, desc=False):
+            key = price_key(row)
+            if key in latest:
+                duplicate_ids.append(latest[key])
+            latest[key] = row['id']
+            
+            scanned += 1
+            if scanned % page_size == 0:
+                print(f"  走査中... {scanned}件 (重複 {len(duplicate_ids)}件)")
+        
+        print(f"  走査完了: {scanned}件 (重複 {len(duplicate_ids)}件)")
+        
+        if dry_run:
+            print(f"削除対象: {len(duplicate_ids)}件（dry-run）")
+            return len(duplicate_ids)
+        
+        deleted = 0
+        for i in range(0, len(duplicate_ids), batch_size):
+            batch = duplicate_ids[i:i + batch_size]
+            self.client.table('price_history').delete().in_('id', batch).execute()
+            deleted += len(batch)
+            print(f"  削除中... {deleted}/{len(duplicate_ids)}件")
+        
+        print(f"重複を{deleted}件削除しました")
+        return deleted
+    
+    def ensure_partitions(self, months_ahead: int = 3) -> List[str]:
+        """
+        今月〜指定月数先までの月別パーティションを作成
+        （migration_price_history_partitioning.sql の関数を呼び出す）
+        
+        Args:
+            months_ahead: 何か月先まで作成するか
+            
+        Returns:
+            List[str]: 新たに作成したパーティション名
+        """
+        response = self.client.rpc(
+            'ensure_price_history_partitions',
+            {'p_months_ahead': months_ahead}
+        ).execute()
+        
+        created = [
+            row if isinstance(row, str) else row.get('ensure_price_history_partitions')
+            for row in (response.data or [])
+        ]
+        print(f"パーティションを{len(created)}件作成しました")
+        for name in created:
+            print(f"  + {name}")
+        
+        return created
+    
+    def downsample_history(self, keep_months: int = 3, dry_run: bool = False) -> List[Dict]:
+        """
+        保持期間を過ぎた月のデータを週次集約（price_history_weekly）に移し、パーティションを削除
+        
+        Args:
+            keep_months: 全件保持する月数（今月を除く）
+            dry_run: Trueなら対象と件数を表示するだけで変更しない
+            
+        Returns:
+            List[Dict]: パーティションごとの {partition_name, raw_rows, weekly_rows}
+        """
+        response = self.client.rpc(
+            'downsample_price_history',
+            {'p_keep_months': keep_months, 'p_dry_run': dry_run}
+        ).execute()
+        
+        results = response.data or []
+        label = "（dry-run）" if dry_run else ""
+        print(f"週次集約の対象: {len(results)}パーティション{label}")
+        for row in results:
+            print(f"  - {row['partition_name']}: {row['raw_rows']:,}件 → 週次 {row['weekly_rows']:,}件")
+        
+        return results
+    
+    def _fetch_history_page(
+        self,
+        select: str,
+        page_size: int,
+        desc: bool,
+        since: Optional[str],
+        until: Optional[str],
+        cursor: Optional[tuple]
+    ) -> List[Dict]:
+        """
+        (captured_at, id) のキーセットで1ページ分を取得
+        """
+        query = self.client.table('price_history')\
+            .select(select)\
+            .order('captured_at', desc=desc)\
+            .order('id', desc=desc)\
+            .limit(page_size)
+        
+        if since:
+            query = query.gte('captured_at', since)
+        if until:
+            query = query.lt('captured_at', until)
+        if cursor:
+            # 前ページの最後の行より後ろ（降順なら前）から取得
+            op = 'lt' if desc else 'gt'
+            captured_at, row_id = _quote_value(cursor[0]), _quote_value(cursor[1])
+            query = query.or_(
+                f"captured_at.{op}.{captured_at},"
+                f"and(captured_at.eq.{captured_at},id.{op}.{row_id})"
+            )
+        
+        return query.execute().data or []
+    
+    def iter_price_history(
+        self,
+        columns: Optional[List[str]] = None,
+        page_size: int = 1000,
+        desc: bool = True,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        price_historyを (captured_at, id) のキーセットでページングしながら1行ずつ返す
+        メモリに保持するのは最大2ページ分のみ
+        
+        PostgRESTは1回の応答を max-rows（Supabaseでは1000件）までに切り詰めるため、
+        page_size より少ない件数が返っても続きがある場合がある。空のページが返るまで取得を続ける
+        
+        Args:
+            columns: 取得する列（省略時は全列）
+            page_size: 1ページの件数
+            desc: Trueなら新しい順、Falseなら古い順
+            since: この日時以降（captured_at >= since）
+            until: この日時より前（captured_at < until）
+            prefetch: Trueなら現在のページを処理している間に次のページを別スレッドで取得
+            
+        Yields:
+            Dict: 価格情報（columns指定時はその列のみ）
+        """
+        if columns:
+            # ページングに必要な列は取得し、指定がなければ返す前に取り除く
+            extra = [c for c in ('captured_at', 'id') if c not in columns]
+            select = ','.join(list(columns) + extra)
+        else:
+            extra = []
+            select = '*'
+        
+        def fetch(cursor):
+            return self._fetch_history_page(select, page_size, desc, since, until, cursor)
+        
+        def next_cursor(rows):
+            if not rows:
+                return None
+            return rows[-1]['captured_at'], rows[-1]['id']
+        
+        def strip(rows):
+            for row in rows:
+                for column in extra:
+                    row.pop(column, None)
+                yield row
+        
+        if not prefetch:
+            cursor = None
+            while True:
+                rows = fetch(cursor)
+                cursor = next_cursor(rows)
+                yield from strip(rows)
+                if cursor is None:
+                    return
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, None)
+            while future is not None:
+                rows = future.result()
+                cursor = next_cursor(rows)
+                # 次のページの取得を先に開始してから現在のページを返す
+                future = executor.submit(fetch, cursor) if cursor else None
+                yield from strip(rows)
     
-    def get_latest_prices(self, limit: int = 10) -> List[Dict]:
+    def get_latest_prices(self, limit: int = 10, columns: Optional[List[str]] = None) -> List[Dict]:
         """
         最新の価格情報を取得
         
         Args:
             limit: 取得件数
+            columns: 取得する列（省略時は全列）
             
         Returns:
             List[Dict]: 価格情報のリスト
         """
         try:
             response = self.client.table('price_history')\
-                .select('*')\
+                .select(','.join(columns) if columns else '*')\
                 .order('captured_at', desc=True)\
                 .limit(limit)\
                 .execute()
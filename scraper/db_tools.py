@@ -0,0 +1,138 @@
+"""
+price_historyのメンテナンス用コマンド
+
+使用例:
+    python db_tools.py compact             # 同日の重複を削除
+    python db_tools.py compact --dry-run   # 削除対象の件数のみ表示
+    python db_tools.py partitions          # 3か月先までの月別パーティションを作成
+    python db_tools.py retention           # 3か月より前を週次集約してパーティション削除
+    python db_tools.py export --columns source,model_name,storage,price,captured_at --output prices.csv
+
+partitions / retention は migration_price_history_partitioning.sql の適用と
+service_role key（SUPABASE_KEY）が必要
+"""
+import argparse
+import csv
+import json
+import sys
+
+
+def cmd_compact(args) -> int:
+    """
+    過去データの重複を削除
+    """
+    from db_client import SupabaseClient
+    
+    client = SupabaseClient()
+    client.compact_duplicates(
+        page_size=args.page_size,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run
+    )
+    return 0
+
+
+def cmd_partitions(args) -> int:
+    """
+    月別パーティションを作成
+    """
+    from db_client import SupabaseClient
+    
+    client = SupabaseClient()
+    client.ensure_partitions(months_ahead=args.months_ahead)
+    return 0
+
+
+def cmd_retention(args) -> int:
+    """
+    保持期間を過ぎたデータを週次集約
+    """
+    from db_client import SupabaseClient
+    
+    client = SupabaseClient()
+    client.downsample_history(keep_months=args.keep_months, dry_run=args.dry_run)
+    return 0
+
+
+def cmd_export(args) -> int:
+    """
+    price_historyをCSV/JSON Lines形式で書き出す（キーセットページングで一定メモリ）
+    """
+    from db_client import SupabaseClient
+    
+    columns = [c.strip() for c in args.columns.split(',') if c.strip()] if args.columns else None
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    
+    count = 0
+    try:
+        with SupabaseClient() as client:
+            rows = client.iter_price_history(
+                columns=columns,
+                page_size=args.page_size,
+                desc=not args.oldest_first,
+                since=args.since,
+                until=args.until,
+                prefetch=not args.no_prefetch
+            )
+            
+            writer = None
+            for row in rows:
+                if args.format == 'jsonl':
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                else:
+                    if writer is None:
+                        writer = csv.DictWriter(out, fieldnames=columns or list(row.keys()))
+                        writer.writeheader()
+                    writer.writerow(row)
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    print(f"{count}件を書き出しました", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    """
+    コマンドライン引数を解析
+    """
+    parser = argparse.ArgumentParser(description="ResaleTracker - price_historyメンテナンス")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    compact = subparsers.add_parser('compact', help="同日の同じキーの重複を削除（最新の1件を残す）")
+    compact.add_argument('--page-size', type=int, default=1000, help="読み込み時の1ページの件数")
+    compact.add_argument('--batch-size', type=int, default=200, help="1回のDELETEで削除する件数")
+    compact.add_argument('--dry-run', action='store_true', help="削除せず件数のみ表示")
+    compact.set_defaults(func=cmd_compact)
+    
+    partitions = subparsers.add_parser('partitions', help="今月〜数か月先の月別パーティションを作成")
+    partitions.add_argument('--months-ahead', type=int, default=3, help="何か月先まで作成するか")
+    partitions.set_defaults(func=cmd_partitions)
+    
+    retention = subparsers.add_parser('retention', help="保持期間を過ぎた月を週次集約してパーティションを削除")
+    retention.add_argument('--keep-months', type=int, default=3, help="全件保持する月数（今月を除く）")
+    retention.add_argument('--dry-run', action='store_true', help="変更せず対象のみ表示")
+    retention.set_defaults(func=cmd_retention)
+    
+    export = subparsers.add_parser('export', help="price_historyをCSV/JSON Linesで書き出す")
+    export.add_argument('--columns', help="取得する列（カンマ区切り、省略時は全列）")
+    export.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help="出力形式")
+    export.add_argument('--output', help="出力ファイル（省略時は標準出力）")
+    export.add_argument('--since', help="この日時以降（ISO形式、例: 2026-01-01）")
+    export.add_argument('--until', help="この日時より前（ISO形式）")
+    export.add_argument('--oldest-first', action='store_true', help="古い順に出力（既定は新しい順）")
+    export.add_argument('--page-size', type=int, default=1000, help="1ページの件数")
+    export.add_argument('--no-prefetch', action='store_true', help="次ページの先読みを無効化")
+    export.set_defaults(func=cmd_export)
+    
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,172 @@
 """
-メインスクリプト: 4社のスクレイピング → DB保存を一連で実行
+メインスクリプト: 各社のスクレイピング → DB保存を一連で実行
+
+使用例:
+    python main.py                    # 全業者
+    python main.py --only iosys       # イオシスのみ
+    python main.py --exclude netoff   # ネットオフ以外
+    python main.py --list             # 登録済みの業者を表示
+    python main.py --daemon           # 常駐モード（業者ごとに定期実行）
+    python main.py --profile          # 業者ごと・DB保存のプロファイルを screenshots/profiles/ に保存
+    python main.py --workers 4        # 業者×URLを4プロセスで並列に抽出
 """
+import argparse
+import os
 import sys
 import time
-from scraper import MobileMixScraper
-from iosys_scraper import IosysScraper
-from netoff_scraper import NetoffScraper
-from janpara_scraper import JanparaScraper
-from db_client import SupabaseClient
+from registry import available_sources, get_label, load_scraper, select_sources
+
+
+def parse_args(argv=None):
+    """
+    コマンドライン引数を解析
+    """
+    parser = argparse.ArgumentParser(description="ResaleTracker - 価格データ収集スクリプト")
+    parser.add_argument(
+        '--only', nargs='+', default=[], metavar='SOURCE',
+        help="指定した業者のみ実行（例: --only iosys janpara）"
+    )
+    parser.add_argument(
+        '--exclude', nargs='+', default=[], metavar='SOURCE',
+        help="指定した業者を除外（例: --exclude netoff）"
+    )
+    parser.add_argument(
+        '--list', action='store_true',
+        help="登録済みの業者を表示して終了"
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help="cProfile・tracemalloc・Playwrightトレースを screenshots/profiles/ に保存"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1, metavar='N',
+        help="業者×URLをNプロセスで並列に抽出（0でCPU数、既定1は順番に実行）"
+    )
+    parser.add_argument(
+        '--daemon', action='store_true',
+        help="常駐モード: ブラウザを起動したまま業者ごとの間隔で定期実行"
+    )
+    parser.add_argument(
+        '--interval', type=float, default=60, metavar='MINUTES',
+        help="常駐モードの実行間隔（分、specsの interval_minutes が優先）"
+    )
+    parser.add_argument(
+        '--jitter', type=float, default=120, metavar='SECONDS',
+        help="常駐モードの実行時刻の揺らぎ（秒）"
+    )
+    parser.add_argument(
+        '--port', type=int, default=int(os.getenv('PORT', '8080')),
+        help="常駐モードの /health・/metrics のポート（0で無効）"
+    )
+    parser.add_argument(
+        '--host', default=os.getenv('HOST', '127.0.0.1'),
+        help="常駐モードの /health・/metrics の待ち受けアドレス（コンテナでは 0.0.0.0）"
+    )
+    args = parser.parse_args(argv)
+    
+    # 組み合わせられないオプション（黙って無視しない）
+    if args.workers < 0:
+        parser.error("--workers には0以上を指定してください")
+    if args.daemon and args.workers != 1:
+        parser.error("--daemon と --workers は同時に指定できません（常駐モードは1つのブラウザで順に実行します）")
+    if args.daemon and args.profile:
+        parser.error("--daemon と --profile は同時に指定できません")
+    
+    return args
+
+
+def run_with_workers(sources, args) -> int:
+    """
+    複数プロセスで抽出し、親プロセスでまとめて保存
+    """
+    from sharding import run_sharded
+    
+    print("=" * 60)
+    print(f"ResaleTracker - 価格データ収集スクリプト（{len(sources)}社・並列）")
+    print("=" * 60)
+    
+    try:
+        result = run_sharded(sources, workers=args.workers or None, profile=args.profile)
+    except Exception as e:
+        # ワーカー・キュー・DB保存のどこで失敗したかは例外の種類とメッセージで示す
+        print(f"✗ 並列実行エラー: {type(e).__name__}: {e}")
+        return 1
+    
+    print("\n" + "=" * 60)
+    for source, count in result['by_source'].items():
+        print(f"  {get_label(source)}: {count}件")
+    print(f"合計 {result['total']}件の価格情報を取得 / {result['saved']}件を保存")
+    if result['errors']:
+        print(f"失敗: {len(result['errors'])}件")
+    print("=" * 60)
+    
+    if result['total'] == 0:
+        print("\n⚠ 価格情報が1件も抽出できませんでした")
+        return 1
+    
+    print("\n抽出された価格情報（最初の10件）:")
+    for i, price in enumerate(result['prices'], 1):
+        color_info = f" ({price['color_note']})" if price.get('color_note') else ""
+        print(f"  {i}. [{get_label(price['source'])}] {price['model_name']} {price['storage']}{color_info}: {price['price']:,}円")
+    
+    return 0
 
 
-def main():
+def main(argv=None):
     """
     メイン処理:
-    1. 4社のサイトから価格情報を抽出
+    1. 選択した業者のサイトから価格情報を抽出
     2. Supabaseに一括保存
     """
+    args = parse_args(argv)
+    
+    if args.list:
+        for source in available_sources():
+            print(f"{source}\t{get_label(source)}")
+        return 0
+    
+    try:
+        sources = select_sources(only=args.only, exclude=args.exclude)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+    
+    if not sources:
+        print("⚠ 実行対象の業者がありません")
+        return 1
+    
+    if args.daemon:
+        from daemon import run_daemon
+        return run_daemon(
+            sources,
+            interval_minutes=args.interval,
+            jitter_seconds=args.jitter,
+            port=args.port or None,
+            host=args.host
+        )
+    
+    if args.workers != 1:
+        return run_with_workers(sources, args)
+    
     print("=" * 60)
-    print("ResaleTracker - 価格データ収集スクリプト（4社）")
+    print(f"ResaleTracker - 価格データ収集スクリプト（{len(sources)}社）")
     print("=" * 60)
     
-    # スクレイパーのリスト
-    scrapers = [
-        ("モバイルミックス", MobileMixScraper()),
-        ("イオシス", IosysScraper()),
-        ("ネットオフ", NetoffScraper()),
-        ("じゃんぱら", JanparaScraper()),
-    ]
-    
     all_prices = []
     success_count = 0
     error_count = 0
+    memory_stats = {}
     
-    # 各サイトから価格情報を抽出
-    for i, (name, scraper) in enumerate(scrapers, 1):
+    # 各サイトから価格情報を抽出（スクレイパーはここで初めて読み込まれる）
+    for i, source in enumerate(sources, 1):
+        name = get_label(source)
         try:
-            print(f"\n[{i}/4] {name} - 価格情報を抽出中...")
+            print(f"\n[{i}/{len(sources)}] {name} - 価格情報を抽出中...")
+            scraper = load_scraper(source)
+            if args.profile:
+                scraper.enable_profiling()
             prices = scraper.extract_prices()
+            memory_stats[source] = scraper.stats
             
             if prices:
                 print(f"✓ {len(prices)}件の価格情報を抽出しました")
@@ -47,7 +177,7 @@ def main():
                 error_count += 1
             
             # 次のサイトまで2秒待機（最後のサイトは待機不要）
-            if i < len(scrapers):
+            if i < len(sources):
                 print("  次のサイトまで2秒待機...")
                 time.sleep(2)
                 
@@ -61,14 +191,26 @@ def main():
     print("\n" + "=" * 60)
     print(f"抽出完了: 成功 {success_count}社 / 失敗 {error_count}社")
     print(f"合計 {len(all_prices)}件の価格情報を取得")
+    if memory_stats:
+        from base_scraper import format_memory_stats
+        print("メモリ（業者別）:")
+        for source, stats in memory_stats.items():
+            print(f"  {get_label(source)}: {format_memory_stats(stats)}")
     print("=" * 60)
     
     # データベースに保存
     if all_prices:
         print(f"\n[保存] データベースに保存中... (合計 {len(all_prices)}件)")
         try:
-            db_client = SupabaseClient()
-            saved_count = db_client.save_prices(all_prices)
+            from db_client import SupabaseClient
+            if args.profile:
+                from profiling import profile_run
+                with profile_run("db"):
+                    db_client = SupabaseClient()
+                    saved_count = db_client.save_prices(all_prices)
+            else:
+                db_client = SupabaseClient()
+                saved_count = db_client.save_prices(all_prices)
             print(f"✓ {saved_count}件をデータベースに保存しました")
         except Exception as e:
             print(f"⚠ データベース保存エラー: {e}")
@@ -84,12 +226,7 @@ def main():
     # 抽出された価格情報のサマリーを表示
     print("\n抽出された価格情報（最初の10件）:")
     for i, price in enumerate(all_prices[:10], 1):
-        source_name = {
-            'mobile_mix': 'モバイルミックス',
-            'iosys': 'イオシス',
-            'netoff': 'ネットオフ',
-            'janpara': 'じゃんぱら'
-        }.get(price['source'], price['source'])
+        source_name = get_label(price['source'])
         
         color_info = f" ({price['color_note']})" if price.get('color_note') else ""
         print(f"  {i}. [{source_name}] {price['model_name']} {price['storage']}{color_info}: {price['price']:,}円")
@@ -0,0 +1,36 @@
+-- ResaleTracker - 価格変動イベントテーブル
+-- このSQLをSupabase SQL Editorで実行してください
+--
+-- db_client.py の save_prices が、保存時に直近価格と比べて変動したキーだけを記録する
+-- （old_priceがNULLの行は新規に出現したキー）
+--
+-- change_pctをNUMERIC(7, 2)で作成済みの環境では、次を実行して桁数を広げてください
+-- ALTER TABLE price_change_events ALTER COLUMN change_pct TYPE NUMERIC(12, 2);
+
+-- Step 1: テーブルを作成
+CREATE TABLE IF NOT EXISTS price_change_events (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  source TEXT NOT NULL,
+  model_name TEXT NOT NULL,
+  storage TEXT NOT NULL,
+  color_note TEXT,
+  old_price INTEGER,
+  new_price INTEGER NOT NULL,
+  change INTEGER,
+  change_pct NUMERIC(12, 2),
+  captured_at TIMESTAMPTZ NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+-- Step 2: インデックスを作成（新しい順の取得と機種別の絞り込み用）
+CREATE INDEX IF NOT EXISTS idx_price_change_events_captured_at
+  ON price_change_events(captured_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_price_change_events_model
+  ON price_change_events(model_name, storage);
+
+-- Step 3: コメントを追加
+COMMENT ON TABLE price_change_events IS '買取価格の変動イベント（price_history保存時に作成）';
+COMMENT ON COLUMN price_change_events.old_price IS '変動前の価格（NULLなら新規）';
+COMMENT ON COLUMN price_change_events.change IS '変動額（new_price - old_price）';
+COMMENT ON COLUMN price_change_events.change_pct IS '変動率（%）。列の範囲を超える場合はNULL';
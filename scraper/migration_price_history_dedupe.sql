@@ -0,0 +1,35 @@
+-- ResaleTracker - price_historyの重複防止（1日1件/キー）
+-- このSQLをSupabase SQL Editorで実行してください
+--
+-- キー: (source, model_name, storage, color_note, captured_date)
+-- captured_dateは取得日時の日本時間の日付（db_client.pyが保存時に設定）
+--
+-- 実行順:
+--   1. Step 1〜2 を実行
+--   2. scraperディレクトリで `python db_tools.py compact` を実行（既存の重複を削除）
+--   3. Step 3〜4 を実行
+
+-- Step 1: captured_dateカラムを追加
+ALTER TABLE price_history
+ADD COLUMN IF NOT EXISTS captured_date DATE;
+
+-- Step 2: 既存データに日付を設定
+UPDATE price_history
+SET captured_date = (captured_at AT TIME ZONE 'Asia/Tokyo')::date
+WHERE captured_date IS NULL;
+
+-- Step 3: NOT NULL制約と一意制約を追加（color_noteのNULLも同一値として扱う）
+ALTER TABLE price_history
+ALTER COLUMN captured_date SET NOT NULL;
+
+ALTER TABLE price_history
+ADD CONSTRAINT price_history_daily_key
+  UNIQUE NULLS NOT DISTINCT (source, model_name, storage, color_note, captured_date);
+
+-- db_client.py の iter_price_history / db_tools.py export が (captured_at, id) のキーセットで
+-- 読み進めるためのインデックス（各ページをソートせずにインデックス順で取得できる）
+CREATE INDEX IF NOT EXISTS idx_price_history_captured_at_id
+  ON price_history(captured_at, id);
+
+-- Step 4: コメントを追加
+COMMENT ON COLUMN price_history.captured_date IS '取得日（日本時間）。1日1件/キーの一意制約に使用';
@@ -0,0 +1,256 @@
+-- ResaleTracker - price_historyの月別パーティション化と古いデータの週次集約
+-- このSQLをSupabase SQL Editorで実行してください
+--
+-- 前提: migration_price_history_dedupe.sql 適用済み（captured_date列と一意制約があること）
+--
+-- 構成:
+--   price_history            captured_dateで月別にRANGEパーティション化（直近数か月は全件保持）
+--   price_history_weekly     保持期間を過ぎた月を週次集約したテーブル
+--   price_history_default    月別パーティションがない日付の行を受け止めるDEFAULTパーティション
+--   ensure_price_history_partitions()  今月〜数か月先のパーティションを作成（DEFAULTにある該当月の行は移す）
+--   downsample_price_history()         保持期間を過ぎた月を週次集約してパーティションを削除
+--
+-- 関数はDDLを実行するためSECURITY DEFINERで作成し、service_roleのみ実行可能にしています。
+-- db_tools.py から実行する場合は SUPABASE_KEY に service_role key を設定してください。
+--
+-- 適用済みの環境には Step 2b と Step 4 だけを実行すればDEFAULTパーティションを追加できます。
+-- (captured_at, id) のインデックスがない環境では Step 2 の idx_price_history_captured_at_id も実行してください。
+
+BEGIN;
+
+-- Step 1: 既存テーブルを退避
+ALTER TABLE price_history RENAME TO price_history_legacy;
+ALTER TABLE price_history_legacy RENAME CONSTRAINT price_history_daily_key TO price_history_legacy_daily_key;
+ALTER TABLE price_history_legacy RENAME CONSTRAINT price_history_pkey TO price_history_legacy_pkey;
+-- インデックス名はスキーマ内で一意のため、新テーブル用に名前を空ける
+ALTER INDEX IF EXISTS idx_price_history_model RENAME TO idx_price_history_legacy_model;
+ALTER INDEX IF EXISTS idx_price_history_captured_at RENAME TO idx_price_history_legacy_captured_at;
+ALTER INDEX IF EXISTS idx_price_history_captured_at_id RENAME TO idx_price_history_legacy_captured_at_id;
+ALTER INDEX IF EXISTS idx_price_history_model_storage RENAME TO idx_price_history_legacy_model_storage;
+ALTER INDEX IF EXISTS idx_price_history_source RENAME TO idx_price_history_legacy_source;
+ALTER INDEX IF EXISTS idx_price_history_source_model RENAME TO idx_price_history_legacy_source_model;
+
+-- Step 2: パーティション化したテーブルを作成
+-- （パーティションキーを含める必要があるため主キーは (id, captured_date)）
+CREATE TABLE price_history (
+  id UUID DEFAULT gen_random_uuid() NOT NULL,
+  source TEXT NOT NULL DEFAULT 'mobile_mix',
+  model_name TEXT NOT NULL,
+  storage TEXT NOT NULL,
+  price INTEGER NOT NULL,
+  color_note TEXT,
+  captured_at TIMESTAMPTZ NOT NULL,
+  captured_date DATE NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+  PRIMARY KEY (id, captured_date),
+  CONSTRAINT price_history_daily_key
+    UNIQUE NULLS NOT DISTINCT (source, model_name, storage, color_note, captured_date)
+) PARTITION BY RANGE (captured_date);
+
+CREATE INDEX IF NOT EXISTS idx_price_history_captured_at
+  ON price_history(captured_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_price_history_source_model
+  ON price_history(source, model_name, storage);
+
+-- iter_price_history / export の (captured_at, id) キーセットページング用
+CREATE INDEX IF NOT EXISTS idx_price_history_captured_at_id
+  ON price_history(captured_at, id);
+
+COMMENT ON TABLE price_history IS 'iPhone買取価格の履歴データ（captured_dateで月別パーティション）';
+COMMENT ON COLUMN price_history.source IS '業者名（mobile_mix, iosys, netoff, janpara）';
+COMMENT ON COLUMN price_history.captured_date IS '取得日（日本時間）。パーティションキー';
+
+-- Step 2b: DEFAULTパーティション
+-- パーティションの作成が遅れても保存が "no partition of relation found" で失敗しないようにする
+CREATE TABLE IF NOT EXISTS price_history_default PARTITION OF price_history DEFAULT;
+
+-- Step 3: 週次集約テーブルを作成
+CREATE TABLE IF NOT EXISTS price_history_weekly (
+  source TEXT NOT NULL,
+  model_name TEXT NOT NULL,
+  storage TEXT NOT NULL,
+  color_note TEXT,
+  week_start DATE NOT NULL,
+  min_price INTEGER NOT NULL,
+  max_price INTEGER NOT NULL,
+  avg_price INTEGER NOT NULL,
+  last_price INTEGER NOT NULL,
+  sample_count INTEGER NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+  CONSTRAINT price_history_weekly_key
+    UNIQUE NULLS NOT DISTINCT (source, model_name, storage, color_note, week_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_history_weekly_week_start
+  ON price_history_weekly(week_start DESC);
+
+COMMENT ON TABLE price_history_weekly IS '保持期間を過ぎたprice_historyの週次集約（週の開始日は月曜）';
+
+-- Step 4: パーティション作成関数
+-- p_fromを指定するとその月から作成（移行時に過去分を作るため）
+-- DEFAULTパーティションに残っている月（作成が遅れた過去の月を含む）も作成し、行を移す
+CREATE OR REPLACE FUNCTION ensure_price_history_partitions(
+  p_months_ahead INTEGER DEFAULT 3,
+  p_from DATE DEFAULT NULL
+)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_first DATE := date_trunc('month', LEAST(COALESCE(p_from, CURRENT_DATE), CURRENT_DATE))::date;
+  v_last DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::date;
+  v_default_months DATE[] := '{}';
+  v_month DATE;
+  v_next DATE;
+  v_name TEXT;
+BEGIN
+  IF to_regclass('price_history_default') IS NOT NULL THEN
+    SELECT COALESCE(array_agg(DISTINCT date_trunc('month', captured_date)::date), '{}')
+      INTO v_default_months
+      FROM price_history_default;
+  END IF;
+
+  FOR v_month IN
+    SELECT m::date FROM generate_series(v_first, v_last, INTERVAL '1 month') AS m
+    UNION
+    SELECT unnest(v_default_months)
+    ORDER BY 1
+  LOOP
+    v_name := 'price_history_' || to_char(v_month, 'YYYYMM');
+    v_next := (v_month + INTERVAL '1 month')::date;
+    CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+
+    -- DEFAULTパーティションに該当月の行があるとパーティションを追加できないため、
+    -- 単独のテーブルとして作成して行を移してからアタッチする
+    EXECUTE format('CREATE TABLE %I (LIKE price_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+    IF to_regclass('price_history_default') IS NOT NULL THEN
+      EXECUTE format(
+        'WITH moved AS (DELETE FROM price_history_default '
+        'WHERE captured_date >= %L AND captured_date < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        v_month, v_next, v_name
+      );
+    END IF;
+    EXECUTE format(
+      'ALTER TABLE price_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+      v_name, v_month, v_next
+    );
+    RETURN NEXT v_name;
+  END LOOP;
+END;
+$$;
+
+-- Step 5: 保持期間を過ぎた月の週次集約とパーティション削除
+CREATE OR REPLACE FUNCTION downsample_price_history(
+  p_keep_months INTEGER DEFAULT 3,
+  p_dry_run BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (partition_name TEXT, raw_rows BIGINT, weekly_rows BIGINT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => p_keep_months))::date;
+  v_part RECORD;
+BEGIN
+  -- DEFAULTパーティションに残っている行は月別パーティションに移してから集約する（dry runでは件数のみ報告）
+  IF p_dry_run THEN
+    IF to_regclass('price_history_default') IS NOT NULL THEN
+      partition_name := 'price_history_default';
+      SELECT COUNT(*) INTO raw_rows FROM price_history_default WHERE captured_date < v_cutoff;
+      SELECT COUNT(*) INTO weekly_rows FROM (
+        SELECT 1 FROM price_history_default WHERE captured_date < v_cutoff
+        GROUP BY source, model_name, storage, color_note, date_trunc('week', captured_date)
+      ) w;
+      IF raw_rows > 0 THEN
+        RETURN NEXT;
+      END IF;
+    END IF;
+  ELSE
+    PERFORM ensure_price_history_partitions(0);
+  END IF;
+
+  FOR v_part IN
+    SELECT c.relname AS name,
+           substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([0-9-]+)''\)')::date AS upper_bound
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'price_history'::regclass
+    ORDER BY c.relname
+  LOOP
+    CONTINUE WHEN v_part.upper_bound IS NULL OR v_part.upper_bound > v_cutoff;
+
+    partition_name := v_part.name;
+    EXECUTE format('SELECT COUNT(*) FROM %I', v_part.name) INTO raw_rows;
+
+    IF p_dry_run THEN
+      EXECUTE format(
+        'SELECT COUNT(*) FROM (SELECT 1 FROM %I GROUP BY source, model_name, storage, color_note, '
+        'date_trunc(''week'', captured_date)) w',
+        v_part.name
+      ) INTO weekly_rows;
+      RETURN NEXT;
+      CONTINUE;
+    END IF;
+
+    -- 週の途中で月が変わる場合は、既存の集約とマージする
+    EXECUTE format($sql$
+      INSERT INTO price_history_weekly AS w
+        (source, model_name, storage, color_note, week_start,
+         min_price, max_price, avg_price, last_price, sample_count)
+      SELECT source, model_name, storage, color_note,
+             date_trunc('week', captured_date)::date,
+             MIN(price), MAX(price), ROUND(AVG(price))::integer,
+             (ARRAY_AGG(price ORDER BY captured_at DESC))[1],
+             COUNT(*)
+      FROM %I
+      GROUP BY source, model_name, storage, color_note, date_trunc('week', captured_date)
+      ON CONFLICT ON CONSTRAINT price_history_weekly_key DO UPDATE SET
+        min_price = LEAST(w.min_price, EXCLUDED.min_price),
+        max_price = GREATEST(w.max_price, EXCLUDED.max_price),
+        avg_price = ROUND(
+          (w.avg_price::numeric * w.sample_count + EXCLUDED.avg_price::numeric * EXCLUDED.sample_count)
+          / (w.sample_count + EXCLUDED.sample_count)
+        )::integer,
+        last_price = EXCLUDED.last_price,
+        sample_count = w.sample_count + EXCLUDED.sample_count
+    $sql$, v_part.name);
+    GET DIAGNOSTICS weekly_rows = ROW_COUNT;
+
+    EXECUTE format('ALTER TABLE price_history DETACH PARTITION %I', v_part.name);
+    EXECUTE format('DROP TABLE %I', v_part.name);
+    RETURN NEXT;
+  END LOOP;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ensure_price_history_partitions(INTEGER, DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION downsample_price_history(INTEGER, BOOLEAN) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_price_history_partitions(INTEGER, DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION downsample_price_history(INTEGER, BOOLEAN) TO service_role;
+
+-- Step 6: パーティションを作成して既存データを移行
+SELECT ensure_price_history_partitions(3, (SELECT MIN(captured_date) FROM price_history_legacy));
+
+INSERT INTO price_history
+  (id, source, model_name, storage, price, color_note, captured_at, captured_date, created_at)
+SELECT id, source, model_name, storage, price, color_note, captured_at, captured_date, created_at
+FROM price_history_legacy;
+
+COMMIT;
+
+-- Step 7: 移行結果を確認してから退避テーブルを削除
+-- SELECT (SELECT COUNT(*) FROM price_history) AS new_count,
+--        (SELECT COUNT(*) FROM price_history_legacy) AS legacy_count;
+-- DROP TABLE price_history_legacy;
+
+-- パーティション作成と週次集約はGitHub Actionsの定期実行（db_tools.py partitions / retention）でも毎日実行されます
+-- （任意）pg_cronで定期実行する場合
+-- SELECT cron.schedule('price-history-partitions', '0 0 1 * *',
+--   $$SELECT ensure_price_history_partitions(3)$$);
+-- SELECT cron.schedule('price-history-retention', '30 0 1 * *',
+--   $$SELECT * FROM downsample_price_history(3)$$);
@@ -1,116 +1,115 @@
 """
 ネットオフのサイトから価格情報を取得するスクレイパー
 機種別タブ、買取上限価格
+セレクタ定義: specs/netoff.json
+
+一覧ページの機種別タブ（a.pricelist_link）を1つずつ開いて抽出し、
+(機種名, 容量, 状態) の重複を除いてから返す
 """
-import re
+import sys
 from datetime import datetime
-from typing import List, Dict
-from playwright.sync_api import sync_playwright
-from base_scraper import BaseScraper
+from typing import List, Dict, Iterator
+from base_scraper import BaseScraper, load_spec
+
+
+# タブのリンク先と、同一ページ内のアンカーかどうかを取得
+TAB_LINKS_JS = """
+links => links.map(a => ({
+    href: a.href,
+    hash: a.hash,
+    samePage: a.hash !== '' && a.pathname === location.pathname,
+    text: a.innerText.trim()
+}))
+"""
 
 
 class NetoffScraper(BaseScraper):
     def __init__(self, output_dir: str = "screenshots"):
-        super().__init__(
-            source="netoff",
-            url="https://www.netoff.co.jp/mobilebuy/smartphone/iphone/",
-            output_dir=output_dir
-        )
+        super().__init__(spec=load_spec("netoff"), output_dir=output_dir)
+        # 除外した重複件数（extract_prices実行ごとに加算）
+        self.discarded_duplicates = 0
     
-    def extract_prices(self) -> List[Dict]:
+    def get_tabs(self, page) -> List[Dict]:
+        """
+        機種別タブのリンク一覧を取得（同じリンク先は1回のみ）
         """
-        ネットオフのサイトから価格情報を抽出
+        tabs = page.eval_on_selector_all(self.spec['tab_selector'], TAB_LINKS_JS)
         
-        Returns:
-            List[Dict]: 価格情報のリスト
+        unique = {}
+        for tab in tabs:
+            unique.setdefault(tab['href'], tab)
+        return list(unique.values())
+    
+    def scrape_tab(self, page, tab: Dict, list_url: str) -> Iterator[List[List[str]]]:
+        """
+        1つのタブを開いて行テキストを取得（行は一定件数ずつ読み込まれる）
+        
+        Args:
+            page: Playwrightのページオブジェクト
+            tab: get_tabs() の要素
+            list_url: 一覧ページのURL（ページ内タブは一覧ページ上で切り替える）
         """
-        prices = []
-        captured_at = datetime.now()
+        if tab['samePage']:
+            # 別ページのタブに遷移した後なら、一覧ページを開き直してからタブを切り替える
+            if page.url.split('#')[0] != list_url.split('#')[0]:
+                self.open_page(page, list_url)
+            
+            # ページ内タブ: 対応するパネルの行だけを対象にする
+            page.evaluate("hash => { location.hash = hash; }", tab['hash'])
+            page.wait_for_timeout(self.spec.get('tab_settle_ms', 1000))
+            scope = page.evaluate("hash => '#' + CSS.escape(decodeURIComponent(hash.slice(1)))", tab['hash'])
+            return self.iter_rows(page, scope)
         
-        with sync_playwright() as p:
-            # Chromiumブラウザを起動
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            page = context.new_page()
+        # 別ページのタブ: 遷移して価格が表示されるまで待機
+        page.goto(tab['href'], wait_until="domcontentloaded", timeout=self.spec.get('goto_timeout', 90000))
+        page.wait_for_timeout(self.spec.get('tab_settle_ms', 1000))
+        return self.iter_rows(page)
+    
+    def scrape_url(self, browser, url: str, captured_at: datetime, suffix: str = "") -> List[Dict]:
+        """
+        一覧ページから機種別タブを順に開いて価格情報を抽出
+        """
+        context, page = self.new_page(browser)
+        try:
+            self.open_page(page, url)
+            # リダイレクト後の一覧ページのURL（ページ内タブの判定に使う）
+            list_url = page.url
+            
+            # スクリーンショットを保存
+            self.save_screenshot(page, suffix)
+            
+            tabs = self.get_tabs(page)
+            print(f"\n機種別タブ: {len(tabs)}件")
+            
+            prices = []
+            if not tabs:
+                # タブがない場合は一覧ページ全体から抽出
+                prices.extend(self.parse_rows(self.iter_rows(page), captured_at))
+            
+            for i, tab in enumerate(tabs, 1):
+                try:
+                    print(f"[{i}/{len(tabs)}] {tab['text'] or tab['href']}")
+                    prices.extend(self.parse_rows(self.scrape_tab(page, tab, list_url), captured_at))
+                except Exception as e:
+                    # 個別のタブのエラーはスキップ
+                    print(f"  ⚠ タブの抽出に失敗しました: {tab['href']} - {e}")
+                    continue
+            
+            prices, discarded = self.dedupe_prices(prices)
+            self.discarded_duplicates += discarded
+            if discarded:
+                print(f"  重複を除外: {discarded}件")
             
-            try:
-                print(f"アクセス中: {self.url}")
-                # domcontentloadedで待機（networkidleは使わない）
-                page.goto(self.url, wait_until="domcontentloaded", timeout=90000)
-                
-                # 価格リンクが表示されるまで待機
-                page.wait_for_selector('a.pricelist_link', timeout=30000)
-                page.wait_for_timeout(2000)
-                
-                # スクリーンショットを保存
-                self.save_screenshot(page)
-                
-                # 価格情報を含む要素を取得
-                # サイトの構造に応じて適切なセレクタを使用
-                items = page.query_selector_all('.price-item, .model-item, [class*="iphone"], [class*="price"]')
-                
-                print(f"\n価格情報を抽出中... ({len(items)}要素を検出)")
-                
-                for item in items:
-                    try:
-                        item_text = item.inner_text()
-                        
-                        # iPhoneを含む要素のみ処理
-                        if 'iPhone' not in item_text:
-                            continue
-                        
-                        # モデル名と価格を抽出
-                        lines = item_text.split('\n')
-                        model_text = None
-                        price_text = None
-                        
-                        for line in lines:
-                            line = line.strip()
-                            if 'iPhone' in line:
-                                model_text = line
-                            elif '円' in line and re.search(r'\d', line):
-                                price_text = line
-                        
-                        if model_text and price_text:
-                            # モデル名と容量を分離
-                            model_name, storage = self.parse_model_and_storage(model_text)
-                            
-                            # 価格を数値に変換
-                            price = self.parse_price(price_text)
-                            
-                            if price > 0:
-                                # 価格データを作成
-                                price_data = self.create_price_data(
-                                    model_name=model_name,
-                                    storage=storage,
-                                    price=price,
-                                    color_note="買取上限",
-                                    captured_at=captured_at
-                                )
-                                prices.append(price_data)
-                                
-                                print(f"  ✓ {model_name} {storage}: {price:,}円")
-                    
-                    except Exception as e:
-                        # 個別の要素のエラーはスキップ
-                        continue
-                
-                print(f"\n合計 {len(prices)}件の価格情報を抽出しました")
-                
-                return prices
-                
-            except Exception as e:
-                print(f"エラー: {e}")
-                raise
-            finally:
-                browser.close()
+            return prices
+        finally:
+            self.close_page(context, suffix)
 
 
 if __name__ == "__main__":
     scraper = NetoffScraper()
+    if "--profile" in sys.argv:
+        # cProfile・tracemalloc・Playwrightトレースを screenshots/profiles/ に保存
+        scraper.enable_profiling()
     prices = scraper.extract_prices()
     
     print("\n" + "=" * 60)
@@ -118,3 +117,4 @@ if __name__ == "__main__":
     print("=" * 60)
     for i, price in enumerate(prices, 1):
         print(f"{i}. {price['model_name']} {price['storage']}: {price['price']:,}円")
+    print(f"\n除外した重複: {scraper.discarded_duplicates}件")
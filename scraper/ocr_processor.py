@@ -4,14 +4,14 @@ OCRで価格情報を抽出するプロセッサー
 import re
 from typing import List, Dict
 from datetime import datetime
-import pytesseract
-from PIL import Image
+from base_scraper import normalize_text
 
 
 class OCRProcessor:
     def __init__(self):
         # OCR抽出パターン（SPEC.mdより）
-        self.pattern = r'(iPhone\s*[\w\s]+?\d+(?:GB|TB))\s+(\d{1,3}(?:,\d{3})*円)'
+        self.pattern = re.compile(r'(iPhone\s*[\w\s]+?\d+(?:GB|TB))\s+(\d{1,3}(?:,\d{3})*円)')
+        self.storage_pattern = re.compile(r'(\d+(?:GB|TB))$')
         
     def extract_text_from_image(self, image_path: str) -> str:
         """
@@ -23,6 +23,10 @@ class OCRProcessor:
         Returns:
             str: 抽出されたテキスト
         """
+        # pytesseract / Pillow はOCRを実行する時点で読み込む
+        import pytesseract
+        from PIL import Image
+        
         try:
             # 画像を開く
             image = Image.open(image_path)
@@ -50,8 +54,8 @@ class OCRProcessor:
         if captured_at is None:
             captured_at = datetime.now()
         
-        # 正規表現で価格情報を抽出
-        matches = re.findall(self.pattern, text)
+        # 全角の数字・英字を半角にしてから正規表現で価格情報を抽出
+        matches = self.pattern.findall(normalize_text(text))
         
         prices = []
         for match in matches:
@@ -63,7 +67,7 @@ class OCRProcessor:
             
             # モデル名と容量を分離
             # 例: "iPhone 17 Pro Max 256GB" -> model_name="iPhone 17 Pro Max", storage="256GB"
-            storage_match = re.search(r'(\d+(?:GB|TB))$', model_storage)
+            storage_match = self.storage_pattern.search(model_storage)
             if storage_match:
                 storage = storage_match.group(1)
                 model_name = model_storage[:storage_match.start()].strip()
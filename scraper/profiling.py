@@ -0,0 +1,119 @@
+"""
+スクレイピング処理のプロファイリング（--profile 指定時のみ）
+cProfileの統計とtracemallocのメモリ割り当てを記録し、上位のホットスポットを表示する
+
+出力先: <スクリーンショット保存先>/profiles/
+    <名前>_<日時>.prof          cProfileの統計（snakeviz / pstats で開ける）
+    <名前>_<日時>_summary.txt   処理時間・メモリ割り当ての上位
+    <名前>_<日時>_trace*.zip    Playwrightトレース（npx playwright show-trace で開ける）
+"""
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# サマリーに表示する件数
+TOP_N = 15
+
+
+def profile_dir(output_dir: str = "screenshots") -> str:
+    """
+    プロファイル結果の保存先（スクリーンショットと同じ場所の profiles/）
+    """
+    path = os.path.join(output_dir, "profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def profile_prefix(name: str, output_dir: str = "screenshots") -> str:
+    """
+    プロファイル結果のファイル名（拡張子なし）
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(profile_dir(output_dir), f"{name}_{timestamp}")
+
+
+def _format_stats(profiler: cProfile.Profile, sort_key: str) -> str:
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.strip_dirs().sort_stats(sort_key).print_stats(TOP_N)
+    return buffer.getvalue()
+
+
+def _format_allocations(snapshot: tracemalloc.Snapshot) -> str:
+    lines = []
+    for stat in snapshot.statistics("lineno")[:TOP_N]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size / 1024:10,.1f}KB {stat.count:8,}回  "
+            f"{os.path.basename(frame.filename)}:{frame.lineno}"
+        )
+    return "\n".join(lines)
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int = 5) -> list:
+    """
+    自身の処理時間（tottime）が長い関数の上位
+    """
+    stats = pstats.Stats(profiler)
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    top = []
+    for (filename, lineno, func), (_, calls, tottime, cumtime, _) in entries[:limit]:
+        top.append((f"{os.path.basename(filename)}:{lineno}({func})", calls, tottime, cumtime))
+    return top
+
+
+@contextmanager
+def profile_run(name: str, output_dir: str = "screenshots"):
+    """
+    ブロック内の処理をcProfile・tracemallocで計測し、結果を保存
+    
+    Args:
+        name: 結果ファイルの名前（業者名など）
+        output_dir: スクリーンショット保存先
+    
+    Yields:
+        str: 結果ファイルの接頭辞（Playwrightトレースの保存にも使う）
+    """
+    prefix = profile_prefix(name, output_dir)
+    
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(10)
+    
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield prefix
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        
+        profiler.dump_stats(f"{prefix}.prof")
+        
+        summary = "\n".join([
+            f"# {name} プロファイル ({datetime.now():%Y-%m-%d %H:%M:%S})",
+            f"ピークメモリ: {peak / 1024:,.0f}KB / 終了時: {current / 1024:,.0f}KB",
+            "",
+            "## 累積時間（cumulative）の上位",
+            _format_stats(profiler, "cumulative"),
+            "## 自身の処理時間（tottime）の上位",
+            _format_stats(profiler, "tottime"),
+            "## メモリ割り当ての上位",
+            _format_allocations(snapshot),
+            "",
+        ])
+        with open(f"{prefix}_summary.txt", "w", encoding="utf-8") as f:
+            f.write(summary)
+        
+        print(f"\n[プロファイル] {name}: ピークメモリ {peak / 1024:,.0f}KB")
+        for func, calls, tottime, cumtime in _top_functions(profiler):
+            print(f"  {tottime:8.3f}s (累積 {cumtime:8.3f}s) {calls:>8,}回  {func}")
+        print(f"  保存先: {prefix}.prof / {prefix}_summary.txt")
@@ -0,0 +1,135 @@
+"""
+スクレイパーレジストリ
+業者名 → スクレイパークラスの対応表を管理し、必要になった時点でモジュールを読み込む
+
+specs/*.json にセレクタ定義を置くだけで新しい業者が登録される
+（専用クラスがない業者は BaseScraper の汎用エンジンで実行）
+"""
+import glob
+import importlib
+import json
+import os
+from typing import List, Dict, Iterable, Optional
+
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+
+# 業者名 → 表示名と "モジュール:クラス"（Noneなら汎用エンジン）
+# モジュールは load_scraper() が呼ばれるまでimportしない（Playwright等の読み込みを遅延）
+SCRAPERS: Dict[str, Dict[str, Optional[str]]] = {
+    'mobile_mix': {'label': 'mobile_mix', 'target': 'scraper:MobileMixScraper'},
+    'iosys': {'label': 'iosys', 'target': 'iosys_scraper:IosysScraper'},
+    'netoff': {'label': 'netoff', 'target': 'netoff_scraper:NetoffScraper'},
+    'janpara': {'label': 'janpara', 'target': 'janpara_scraper:JanparaScraper'},
+}
+
+
+def register_scraper(source: str, label: str, target: Optional[str] = None) -> None:
+    """
+    スクレイパーを登録（既存の業者名は上書き）
+
+    Args:
+        source: 業者名（例: 'iosys'）
+        label: 表示名（例: 'イオシス'）
+        target: "モジュール:クラス" 形式の読み込み先（省略時は specs/<source>.json で汎用実行）
+    """
+    if target is not None and ':' not in target:
+        raise ValueError(f"targetは'モジュール:クラス'形式で指定してください: {target}")
+    SCRAPERS[source] = {'label': label, 'target': target}
+
+
+def discover_specs(spec_dir: str = SPEC_DIR) -> None:
+    """
+    セレクタ定義ファイルから表示名を読み込み、未登録の業者を追加
+    """
+    for path in sorted(glob.glob(os.path.join(spec_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+        source = spec.get('source') or os.path.splitext(os.path.basename(path))[0]
+        label = spec.get('label', source)
+        if source in SCRAPERS:
+            SCRAPERS[source]['label'] = label
+        else:
+            register_scraper(source, label)
+
+
+def available_sources() -> List[str]:
+    """
+    登録済みの業者名を登録順に返す
+    """
+    return list(SCRAPERS.keys())
+
+
+def get_label(source: str) -> str:
+    """
+    業者名から表示名を取得（未登録なら業者名をそのまま返す）
+    """
+    entry = SCRAPERS.get(source)
+    return entry['label'] if entry else source
+
+
+def select_sources(
+    only: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    実行対象の業者名を選択
+
+    Args:
+        only: 指定された業者のみ実行（省略時は全業者）
+        exclude: 除外する業者
+
+    Returns:
+        List[str]: 実行対象の業者名（登録順）
+    """
+    only = list(only or [])
+    exclude = list(exclude or [])
+
+    unknown = [s for s in only + exclude if s not in SCRAPERS]
+    if unknown:
+        raise ValueError(
+            f"未登録の業者名: {', '.join(unknown)}"
+            f"（利用可能: {', '.join(available_sources())}）"
+        )
+
+    return [
+        source for source in available_sources()
+        if (not only or source in only) and source not in exclude
+    ]
+
+
+def load_scraper_class(source: str):
+    """
+    業者名に対応するスクレイパークラスを読み込む（ここで初めてimportされる）
+    """
+    if source not in SCRAPERS:
+        raise ValueError(f"未登録の業者名: {source}")
+
+    target = SCRAPERS[source]['target']
+    if target is None:
+        from base_scraper import BaseScraper
+        return BaseScraper
+
+    module_name, class_name = target.split(':', 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def load_scraper(source: str, **kwargs):
+    """
+    業者名に対応するスクレイパーのインスタンスを作成
+
+    Args:
+        source: 業者名
+        **kwargs: スクレイパーのコンストラクタ引数（output_dirなど）
+
+    Returns:
+        BaseScraper: スクレイパーのインスタンス
+    """
+    if SCRAPERS.get(source, {}).get('target', '') is None:
+        from base_scraper import BaseScraper
+        return BaseScraper.from_spec(source, **kwargs)
+    return load_scraper_class(source)(**kwargs)
+
+
+discover_specs()
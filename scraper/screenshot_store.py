@@ -0,0 +1,385 @@
+"""
+スクリーンショットの保存先
+前回と変わらないページは新しいPNGを書かずに前回のファイルを参照し、
+保存するPNGは再圧縮し、ディレクトリ全体を容量上限内に保つ（最後に参照された順に削除）
+
+管理情報は <保存先>/manifest.json に記録する
+
+「変更なし」の判定は既定ではPNGのSHA-256の一致のみ。
+見た目のハッシュ（dHash）での判定は環境変数 SCREENSHOT_PHASH_DISTANCE を指定した場合のみ使う
+（全ページのスクリーンショットでは数桁の価格の違いがハッシュに表れないため）
+
+使用例:
+    python screenshot_store.py                 # 既存のPNGを取り込み・再圧縮して容量上限を適用
+    python screenshot_store.py --budget-mb 50
+    python screenshot_store.py --export upload/ --since 2024-01-10T10:00:00   # 指定時刻以降の取得分をコピー
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".manifest.lock"
+
+# 容量上限（環境変数 SCREENSHOT_BUDGET_MB で変更可能）
+DEFAULT_BUDGET_MB = 100
+
+# 記録しておく取得履歴の件数
+MAX_CAPTURES = 500
+
+# save() が付けるファイル名: <業者名>_<YYYYMMDD>_<HHMMSS>[_<サフィックス>].png
+FILENAME_PATTERN = re.compile(r"^(?P<source>.+)_\d{8}_\d{6}(?:_(?P<suffix>\w+))?\.png$")
+
+
+def content_hash(data: bytes) -> str:
+    """
+    PNGのバイト列のSHA-256
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(data: bytes) -> Optional[str]:
+    """
+    画像の見た目のハッシュ（dHash 64bit、16進数）
+    Pillowが使えない場合はNone
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    
+    with Image.open(io.BytesIO(data)) as image:
+        # 横9×縦8に縮小し、隣り合う画素の明るさの大小をビットにする
+        small = image.convert("L").resize((9, 8))
+        pixels = list(small.getdata())
+    
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+
+def hamming_distance(a: str, b: str) -> int:
+    """
+    2つの16進数ハッシュの異なるビット数
+    """
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def recompress_png(data: bytes) -> bytes:
+    """
+    PNGを可逆のまま最大圧縮で保存し直す（小さくならなければ元のまま）
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    
+    with Image.open(io.BytesIO(data)) as image:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True, compress_level=9)
+    
+    compressed = buffer.getvalue()
+    return compressed if len(compressed) < len(data) else data
+
+
+class ScreenshotStore:
+    def __init__(
+        self,
+        root: str = "screenshots",
+        budget_bytes: Optional[int] = None,
+        max_distance: Optional[int] = None
+    ):
+        """
+        スクリーンショット保存先の初期化
+        
+        Args:
+            root: 保存先ディレクトリ
+            budget_bytes: PNGの合計サイズの上限（省略時は SCREENSHOT_BUDGET_MB または100MB）
+            max_distance: 見た目のハッシュがこのビット数以内の差なら「変更なし」とみなす
+                （省略時は SCREENSHOT_PHASH_DISTANCE。未設定ならSHA-256の一致のみで判定）
+        """
+        if budget_bytes is None:
+            budget_bytes = int(float(os.getenv("SCREENSHOT_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+        if max_distance is None and os.getenv("SCREENSHOT_PHASH_DISTANCE"):
+            max_distance = int(os.getenv("SCREENSHOT_PHASH_DISTANCE"))
+        
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.max_distance = max_distance
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.lock_path = os.path.join(root, LOCK_NAME)
+        os.makedirs(root, exist_ok=True)
+    
+    @contextmanager
+    def _locked(self, timeout: float = 30.0):
+        """
+        manifest.jsonの読み書きを排他（複数プロセスから同じディレクトリに保存する場合）
+        """
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                break
+            except FileExistsError:
+                # 異常終了で残ったロックは一定時間で無視する
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > timeout:
+                        os.remove(self.lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"ロックを取得できません: {self.lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
+    
+    def _load(self) -> Dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"files": {}, "captures": []}
+    
+    def _save(self, manifest: Dict) -> None:
+        # 書き込み途中で読まれないよう一時ファイル経由で置き換える
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _find_unchanged(
+        self, manifest: Dict, source: str, suffix: str, sha: str, phash: Optional[str]
+    ) -> Optional[str]:
+        """
+        同じ業者・同じページ（suffix）の直近の保存ファイルが今回と同じ内容ならそのファイル名を返す
+        """
+        candidates = [
+            (name, entry) for name, entry in manifest["files"].items()
+            if entry.get("source") == source and entry.get("suffix", "") == suffix
+        ]
+        if not candidates:
+            return None
+        
+        name, entry = max(candidates, key=lambda item: item[1]["created_at"])
+        if entry["sha256"] == sha:
+            return name
+        if (
+            self.max_distance is not None and phash and entry.get("phash")
+            and hamming_distance(entry["phash"], phash) <= self.max_distance
+        ):
+            return name
+        return None
+    
+    def _enforce_budget(self, manifest: Dict, keep: Optional[str] = None) -> int:
+        """
+        合計サイズが上限を超えていれば、最後に参照された時刻が古いファイルから削除
+        
+        Returns:
+            int: 削除したファイル数
+        """
+        total = sum(entry["size"] for entry in manifest["files"].values())
+        evicted = 0
+        
+        for name, entry in sorted(manifest["files"].items(), key=lambda item: item[1]["last_used_at"]):
+            if total <= self.budget_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del manifest["files"][name]
+            evicted += 1
+        
+        if evicted:
+            print(f"  スクリーンショットを{evicted}件削除しました（容量上限 {self.budget_bytes // (1024 * 1024)}MB）")
+        return evicted
+    
+    def save(self, source: str, data: bytes, suffix: str = "") -> str:
+        """
+        スクリーンショットを保存（前回と同じなら前回のファイルを参照）
+        
+        Args:
+            source: 業者名
+            data: PNGのバイト列
+            suffix: ファイル名のサフィックス（オプション）
+        
+        Returns:
+            str: スクリーンショットのファイルパス
+        """
+        now = time.time()
+        sha = content_hash(data)
+        # 見た目のハッシュは画像のデコードが必要なため、判定に使う場合のみ計算する
+        phash = perceptual_hash(data) if self.max_distance is not None else None
+        
+        with self._locked():
+            manifest = self._load()
+            
+            name = self._find_unchanged(manifest, source, suffix, sha, phash)
+            reference = name is not None
+            
+            if reference:
+                manifest["files"][name]["last_used_at"] = now
+            else:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                name = f"{source}_{timestamp}"
+                if suffix:
+                    name += f"_{suffix}"
+                name += ".png"
+                
+                compressed = recompress_png(data)
+                with open(os.path.join(self.root, name), "wb") as f:
+                    f.write(compressed)
+                
+                manifest["files"][name] = {
+                    "source": source,
+                    "suffix": suffix,
+                    "sha256": sha,
+                    "phash": phash,
+                    "size": len(compressed),
+                    "created_at": now,
+                    "last_used_at": now,
+                }
+            
+            manifest["captures"].append({
+                "source": source,
+                "captured_at": datetime.now().isoformat(),
+                "file": name,
+                "reference": reference,
+            })
+            manifest["captures"] = manifest["captures"][-MAX_CAPTURES:]
+            
+            self._enforce_budget(manifest, keep=name)
+            self._save(manifest)
+        
+        path = os.path.join(self.root, name)
+        if reference:
+            print(f"  スクリーンショット変更なし（前回を参照）: {path}")
+        else:
+            print(f"  スクリーンショット保存: {path}")
+        return path
+    
+    def compact(self) -> Dict:
+        """
+        manifest.jsonにない既存PNGを取り込んで再圧縮し、容量上限を適用
+        
+        Returns:
+            Dict: {imported, saved_bytes, evicted}
+        """
+        imported = 0
+        saved_bytes = 0
+        
+        with self._locked():
+            manifest = self._load()
+            
+            for name in sorted(os.listdir(self.root)):
+                if not name.endswith(".png") or name in manifest["files"]:
+                    continue
+                
+                path = os.path.join(self.root, name)
+                with open(path, "rb") as f:
+                    data = f.read()
+                
+                compressed = recompress_png(data)
+                if len(compressed) < len(data):
+                    with open(path, "wb") as f:
+                        f.write(compressed)
+                    saved_bytes += len(data) - len(compressed)
+                
+                # 命名規則に合わないファイルはファイル名全体を業者名として扱う
+                match = FILENAME_PATTERN.match(name)
+                mtime = os.path.getmtime(path)
+                manifest["files"][name] = {
+                    "source": match.group("source") if match else name[:-len(".png")],
+                    "suffix": (match.group("suffix") or "") if match else "",
+                    "sha256": content_hash(data),
+                    "phash": perceptual_hash(data),
+                    "size": len(compressed),
+                    "created_at": mtime,
+                    "last_used_at": mtime,
+                }
+                imported += 1
+            
+            # manifest.jsonにあるが実体のないファイルは削除
+            for name in [n for n in manifest["files"] if not os.path.exists(os.path.join(self.root, n))]:
+                del manifest["files"][name]
+            
+            evicted = self._enforce_budget(manifest)
+            self._save(manifest)
+        
+        return {"imported": imported, "saved_bytes": saved_bytes, "evicted": evicted}
+    
+    def export_captures(self, dest: str, since: Optional[str] = None) -> int:
+        """
+        取得履歴のうち since（ISO形式）以降に取得されたファイルを dest にコピー
+        （前回を参照した取得分も含めて、その実行で取得したページをまとめる）
+        
+        Returns:
+            int: コピーしたファイル数
+        """
+        since_at = datetime.fromisoformat(since) if since else None
+        
+        with self._locked():
+            manifest = self._load()
+        
+        names = []
+        for capture in manifest["captures"]:
+            if since_at and datetime.fromisoformat(capture["captured_at"]) < since_at:
+                continue
+            if capture["file"] not in names:
+                names.append(capture["file"])
+        
+        os.makedirs(dest, exist_ok=True)
+        copied = 0
+        for name in names:
+            path = os.path.join(self.root, name)
+            if os.path.exists(path):
+                shutil.copy2(path, os.path.join(dest, name))
+                copied += 1
+        return copied
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="スクリーンショットの再圧縮と容量上限の適用")
+    parser.add_argument("--dir", default="screenshots", help="スクリーンショットのディレクトリ")
+    parser.add_argument("--budget-mb", type=float, help="容量上限（MB）")
+    parser.add_argument("--export", metavar="DIR", help="取得履歴のファイルをDIRにコピー（整理は行わない）")
+    parser.add_argument("--since", help="--export の対象にする取得日時の下限（ISO形式、ローカル時刻）")
+    args = parser.parse_args()
+    
+    budget = int(args.budget_mb * 1024 * 1024) if args.budget_mb else None
+    store = ScreenshotStore(args.dir, budget_bytes=budget)
+    
+    if args.export:
+        count = store.export_captures(args.export, args.since)
+        print(f"{count}件のスクリーンショットを {args.export} にコピーしました")
+        raise SystemExit(0)
+    
+    result = store.compact()
+    
+    print(f"取り込み: {result['imported']}件")
+    print(f"再圧縮で削減: {result['saved_bytes'] / 1024:,.0f}KB")
+    print(f"容量上限で削除: {result['evicted']}件")
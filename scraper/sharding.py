@@ -0,0 +1,184 @@
+"""
+複数プロセスでのスクレイピング（--workers N）
+業者×URLの作業リストをワーカープロセスに分配し（各プロセスが自分のブラウザを起動）、
+抽出結果はキュー経由で親プロセスに集め、1つの SupabaseClient でまとめて保存する
+
+使用例:
+    python main.py --workers 4
+"""
+import multiprocessing
+import os
+import queue
+import time
+from datetime import datetime
+from typing import List, Dict, Tuple
+from registry import get_label, load_scraper
+
+
+# 親プロセスでDBに書き込む単位（件）
+WRITE_BATCH_SIZE = 500
+
+
+def build_work_list(sources: List[str]) -> List[Tuple[str, str, str]]:
+    """
+    業者ごとのURLを (業者名, URL, スクリーンショットのサフィックス) の作業リストにする
+    """
+    work = []
+    for source in sources:
+        scraper = load_scraper(source)
+        for i, url in enumerate(scraper.urls):
+            suffix = str(i + 1) if len(scraper.urls) > 1 else ""
+            work.append((source, url, suffix))
+    return work
+
+
+def scrape_task(scraper, browser, url: str, captured_at: datetime, suffix: str, profile: bool, worker_id: int):
+    """
+    1件の作業を処理（profile指定時はcProfile・tracemalloc・Playwrightトレースを保存）
+    """
+    if not profile:
+        return scraper.scrape_url(browser, url, captured_at, suffix)
+    
+    from profiling import profile_run
+    
+    name = f"{scraper.source}{'_' + suffix if suffix else ''}_w{worker_id}"
+    with profile_run(name, scraper.output_dir) as prefix:
+        scraper.profile_prefix = prefix
+        try:
+            return scraper.scrape_url(browser, url, captured_at, suffix)
+        finally:
+            scraper.profile_prefix = None
+
+
+def worker_main(worker_id: int, tasks, results, captured_at: str, profile: bool) -> None:
+    """
+    ワーカープロセス: 自分のブラウザを起動し、作業キューが空になるまでURLを処理
+    """
+    # Playwrightはワーカー内で読み込む（プロセスごとに別のブラウザ）
+    from playwright.sync_api import sync_playwright
+    
+    captured = datetime.fromisoformat(captured_at)
+    scrapers = {}
+    
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            while True:
+                task = tasks.get()
+                if task is None:
+                    break
+                
+                source, url, suffix = task
+                started = time.time()
+                try:
+                    if source not in scrapers:
+                        scrapers[source] = load_scraper(source)
+                    prices = scrape_task(scrapers[source], browser, url, captured, suffix, profile, worker_id)
+                    results.put(('rows', worker_id, source, url, prices, time.time() - started))
+                except Exception as e:
+                    results.put(('error', worker_id, source, url, str(e), time.time() - started))
+        finally:
+            browser.close()
+            results.put(('done', worker_id, None, None, None, 0))
+
+
+def run_sharded(
+    sources: List[str],
+    workers: int = None,
+    save: bool = True,
+    profile: bool = False
+) -> Dict:
+    """
+    作業リストをワーカープロセスで並列に処理し、結果を1つのライターで保存
+    
+    Args:
+        sources: 実行対象の業者名
+        workers: ワーカープロセス数（省略時はCPU数）
+        save: Falseなら保存せず抽出のみ
+        profile: Trueなら作業ごとにプロファイルとPlaywrightトレースを保存
+    
+    Returns:
+        Dict: {prices（先頭の一部）, total, saved, errors, by_source}
+    """
+    work = build_work_list(sources)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(work)))
+    
+    print(f"作業リスト: {len(work)}件 / ワーカー: {workers}プロセス")
+    
+    # Playwrightはforkした子プロセスでは動かないためspawnを使う
+    ctx = multiprocessing.get_context('spawn')
+    tasks = ctx.Queue()
+    results = ctx.Queue()
+    for task in work:
+        tasks.put(task)
+    for _ in range(workers):
+        tasks.put(None)
+    
+    captured_at = datetime.now().isoformat()
+    processes = [
+        ctx.Process(target=worker_main, args=(i, tasks, results, captured_at, profile), daemon=True)
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    
+    db_client = None
+    pending = []
+    sample = []
+    total = 0
+    saved = 0
+    errors = []
+    by_source = {source: 0 for source in sources}
+    
+    def flush():
+        nonlocal db_client, saved
+        if not pending or not save:
+            pending.clear()
+            return
+        if db_client is None:
+            from db_client import SupabaseClient
+            db_client = SupabaseClient()
+        saved += db_client.save_prices(list(pending))
+        pending.clear()
+    
+    done = 0
+    try:
+        while done < workers:
+            try:
+                kind, worker_id, source, url, payload, duration = results.get(timeout=5)
+            except queue.Empty:
+                # 全ワーカーが（doneを送らずに）終了していれば待つのをやめる
+                if not any(process.is_alive() for process in processes):
+                    print("⚠ 全ワーカーが終了しました（一部の結果が欠けている可能性があります）")
+                    break
+                continue
+            
+            if kind == 'done':
+                done += 1
+            elif kind == 'error':
+                errors.append((source, url, payload))
+                print(f"✗ [W{worker_id}] {get_label(source)} {url}: {payload}")
+            else:
+                total += len(payload)
+                by_source[source] += len(payload)
+                sample.extend(payload[:max(0, 10 - len(sample))])
+                pending.extend(payload)
+                print(f"✓ [W{worker_id}] {get_label(source)} {len(payload)}件 ({duration:.1f}秒) {url}")
+                if len(pending) >= WRITE_BATCH_SIZE:
+                    flush()
+        flush()
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        if db_client is not None:
+            db_client.close()
+    
+    return {
+        'prices': sample,
+        'total': total,
+        'saved': saved,
+        'errors': errors,
+        'by_source': by_source,
+    }
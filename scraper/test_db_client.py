@@ -0,0 +1,208 @@
+"""
+db_client の価格変動イベントと直近価格キャッシュのテスト
+
+実行: cd scraper && python -m pytest -q
+"""
+import json
+import os
+import pytest
+from db_client import SupabaseClient, PostgrestResponse, series_key
+
+
+def price(model='iPhone 15 Pro', storage='256GB', value=100000, captured_at='2024-01-10T12:00:00+09:00'):
+    return {
+        'source': 'iosys',
+        'model_name': model,
+        'storage': storage,
+        'color_note': None,
+        'price': value,
+        'captured_at': captured_at,
+    }
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.rows = []
+    
+    def upsert(self, rows, on_conflict=''):
+        self.rows = rows
+        return self
+    
+    def insert(self, rows):
+        self.rows = rows
+        return self
+    
+    def execute(self):
+        if self.table in self.db.fail:
+            raise RuntimeError(f"{self.table} failed")
+        # PostgreSQLと同様に、1行でも制約に反すればバッチ全体を拒否する
+        reject = self.db.reject.get(self.table)
+        if reject and any(reject(row) for row in self.rows):
+            raise RuntimeError(f"{self.table}: row rejected")
+        self.db.written.setdefault(self.table, []).extend(self.rows)
+        return PostgrestResponse(self.rows)
+
+
+class FakePostgrest:
+    """
+    テーブルごとに書き込まれた行を記録し、指定したテーブルへの書き込みを失敗させる
+    （reject にはテーブルごとに行を拒否する条件を指定する）
+    """
+    
+    def __init__(self):
+        self.fail = set()
+        self.reject = {}
+        self.written = {}
+    
+    def table(self, name):
+        return FakeQuery(self, name)
+    
+    def events(self):
+        return self.written.get('price_change_events', [])
+
+
+@pytest.fixture
+def client(tmp_path):
+    db = SupabaseClient(url='http://localhost', key='test')
+    db._client = FakePostgrest()
+    db.price_cache_path = str(tmp_path / 'last_prices.json')
+    return db
+
+
+def test_compute_price_events_detects_change():
+    last = {series_key(price()): [100000, '2024-01-09T12:00:00+09:00']}
+    
+    events, updated = SupabaseClient.compute_price_events([price(value=95000)], last)
+    
+    assert len(events) == 1
+    assert events[0]['old_price'] == 100000
+    assert events[0]['new_price'] == 95000
+    assert events[0]['change'] == -5000
+    assert events[0]['change_pct'] == -5.0
+    assert updated == {series_key(price()): [95000, '2024-01-10T12:00:00+09:00']}
+
+
+def test_compute_price_events_new_series():
+    events, updated = SupabaseClient.compute_price_events([price()], {})
+    
+    assert len(events) == 1
+    assert events[0]['old_price'] is None
+    assert events[0]['change'] is None
+    assert events[0]['change_pct'] is None
+    assert series_key(price()) in updated
+
+
+def test_compute_price_events_unchanged_price_updates_timestamp_only():
+    last = {series_key(price()): [100000, '2024-01-09T12:00:00+09:00']}
+    
+    events, updated = SupabaseClient.compute_price_events([price()], last)
+    
+    assert events == []
+    assert updated[series_key(price())][1] == '2024-01-10T12:00:00+09:00'
+
+
+def test_compute_price_events_skips_older_rows():
+    last = {series_key(price()): [100000, '2024-01-11T12:00:00+09:00']}
+    
+    events, updated = SupabaseClient.compute_price_events([price(value=90000)], last)
+    
+    assert events == []
+    assert updated == {}
+
+
+def test_compute_price_events_compares_rows_within_batch():
+    rows = [
+        price(value=100000, captured_at='2024-01-10T09:00:00+09:00'),
+        price(value=98000, captured_at='2024-01-10T12:00:00+09:00'),
+    ]
+    
+    events, updated = SupabaseClient.compute_price_events(rows, {})
+    
+    assert [(e['old_price'], e['new_price']) for e in events] == [(None, 100000), (100000, 98000)]
+    assert updated[series_key(price())][0] == 98000
+
+
+def test_compute_price_events_drops_out_of_range_pct():
+    last = {series_key(price()): [1, '2024-01-09T12:00:00+09:00']}
+    
+    events, _ = SupabaseClient.compute_price_events([price(value=2_000_000_000)], last)
+    
+    assert events[0]['change'] == 1_999_999_999
+    assert events[0]['change_pct'] is None
+
+
+def test_save_prices_not_blocked_by_huge_change(client):
+    # change_pct NUMERIC(12, 2) の範囲外を拒否するDBでも、変動の記録が止まらない
+    client._client.reject['price_change_events'] = (
+        lambda row: row['change_pct'] is not None and abs(row['change_pct']) >= 10 ** 10
+    )
+    with open(client.price_cache_path, 'w', encoding='utf-8') as f:
+        json.dump({series_key(price()): [1, '2024-01-09T12:00:00+09:00']}, f)
+    
+    client.save_prices([price(value=2_000_000_000)])
+    client.save_prices([price(value=95000, captured_at='2024-01-11T12:00:00+09:00')])
+    
+    assert [(e['old_price'], e['new_price']) for e in client._client.events()] == [
+        (1, 2_000_000_000),
+        (2_000_000_000, 95000),
+    ]
+    with open(client.price_cache_path, encoding='utf-8') as f:
+        assert json.load(f)[series_key(price())][0] == 95000
+
+
+def test_seed_failure_records_no_events_and_retries(client):
+    def broken(*args, **kwargs):
+        raise RuntimeError("connection reset")
+    client.iter_price_history = broken
+    
+    client.save_prices([price()])
+    client.save_prices([price(model='iPhone 14', value=60000)])
+    
+    # 比較元がないまま「新規」を記録せず、途中の直近価格も書き出さない
+    assert client._client.events() == []
+    assert client._last_prices is None
+    assert not os.path.exists(client.price_cache_path)
+    
+    # 読み込めるようになれば改めてDBから作成する
+    client.iter_price_history = lambda *args, **kwargs: iter([price(value=100000, captured_at='2024-01-09T12:00:00+09:00')])
+    client.save_prices([price(value=95000)])
+    
+    assert [(e['old_price'], e['new_price']) for e in client._client.events()] == [(100000, 95000)]
+
+
+def test_event_insert_failure_keeps_cache(client):
+    with open(client.price_cache_path, 'w', encoding='utf-8') as f:
+        json.dump({series_key(price()): [100000, '2024-01-09T12:00:00+09:00']}, f)
+    client._client.fail.add('price_change_events')
+    
+    assert client.save_prices([price(value=95000)]) == 1
+    
+    # キャッシュを進めないので、次回の保存で同じ変動を再検出できる
+    with open(client.price_cache_path, encoding='utf-8') as f:
+        assert json.load(f)[series_key(price())][0] == 100000
+    
+    client._client.fail.clear()
+    client.save_prices([price(value=95000)])
+    
+    assert [(e['old_price'], e['new_price']) for e in client._client.events()] == [(100000, 95000)]
+    with open(client.price_cache_path, encoding='utf-8') as f:
+        assert json.load(f)[series_key(price())][0] == 95000
+
+
+def test_iter_price_history_continues_past_server_row_cap(client):
+    # PostgRESTが max-rows で応答を切り詰める場合でも全件を返す
+    rows = [{'id': i, 'captured_at': f'2024-01-10T12:00:{i % 60:02d}+09:00'} for i in range(2500)]
+    rows.sort(key=lambda row: (row['captured_at'], row['id']))
+    
+    def fetch_page(select, page_size, desc, since, until, cursor):
+        start = 0
+        if cursor:
+            start = next((i for i, row in enumerate(rows) if (row['captured_at'], row['id']) > cursor), len(rows))
+        return [dict(row) for row in rows[start:start + min(page_size, 1000)]]
+    client._fetch_history_page = fetch_page
+    
+    for prefetch in (True, False):
+        got = list(client.iter_price_history(columns=['id'], page_size=5000, desc=False, prefetch=prefetch))
+        assert [row['id'] for row in got] == [row['id'] for row in rows]
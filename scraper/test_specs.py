@@ -0,0 +1,97 @@
+"""
+specs/*.json のセレクタ定義で、取得した行のテキストを価格データに変換できるかのテスト
+（iter_rows() が返す [機種名候補のテキスト, 価格フィールド1のテキスト, ...] の形を入力にする）
+
+実行: cd scraper && python -m pytest -q
+"""
+from datetime import datetime
+import pytest
+from base_scraper import BaseScraper
+
+
+def cells(*texts):
+    """
+    セル（td, th）ごとのテキスト。同じセレクタのフィールドは同じテキストを受け取る
+    """
+    return list(texts)
+
+
+# 業者ごとに記録した行のテキストと、期待する (機種名, 容量, 状態, 価格)
+CASES = {
+    'iosys': (
+        [
+            # 1列目が機種名、以降は未使用品・中古品の順
+            [cells('iPhone 15 Pro 256GB', '125,000円', '110,000円')] * 2,
+            [cells('iPhone SE (第3世代) 64GB', '-', '２１，０００円')] * 2,
+            [cells('iPhone 13 mini 128GB', '-', '-')] * 2,
+        ],
+        [
+            ('iPhone 15 Pro', '256GB', '未使用品', 125000),
+            ('iPhone 15 Pro', '256GB', '中古品', 110000),
+            ('iPhone SE (第3世代)', '64GB', '中古品', 21000),
+        ],
+    ),
+    'mobile_mix': (
+        [
+            [cells('iPhone 16 Pro Max 256GB', '１８５，０００円', '170,000円')] * 2,
+            [cells('iPhone 16 1TB', '115,000円 108,000円')] * 2,
+        ],
+        [
+            ('iPhone 16 Pro Max', '256GB', None, 185000),
+            ('iPhone 16', '1TB', None, 115000),
+        ],
+    ),
+    'janpara': (
+        [
+            [['iPhone 15 128GB'], ['98,000円'], ['80,000円']],
+            [['iPhone 14 Plus 256GB'], [], ['72,500円']],
+        ],
+        [
+            ('iPhone 15', '128GB', '未使用品', 98000),
+            ('iPhone 15', '128GB', '中古品', 80000),
+            ('iPhone 14 Plus', '256GB', '中古品', 72500),
+        ],
+    ),
+    'netoff': (
+        [
+            # 機種名は th、価格は td。買取価格の範囲のうち最後の「円」のセルが上限
+            [cells('iPhone 14 Pro 128GB', 'SIMフリー', '40,000円', '52,000円'), cells('SIMフリー', '40,000円', '52,000円')],
+            [cells('iPhone 12 64GB', 'SIMフリー', '〜18,000円'), cells('SIMフリー', '〜18,000円')],
+        ],
+        [
+            ('iPhone 14 Pro', '128GB', '買取上限', 52000),
+            ('iPhone 12', '64GB', '買取上限', 18000),
+        ],
+    ),
+}
+
+
+@pytest.mark.parametrize('source', sorted(CASES))
+def test_spec_parses_recorded_rows(source, tmp_path):
+    rows, expected = CASES[source]
+    scraper = BaseScraper.from_spec(source, output_dir=str(tmp_path))
+    # 1行のフィールド数は定義の価格フィールド数＋機種名
+    assert all(len(row) == len(scraper.spec['prices']) + 1 for row in rows)
+
+    prices = scraper.parse_rows(iter(rows), datetime(2024, 1, 10, 12, 0))
+
+    assert [(p['model_name'], p['storage'], p['color_note'], p['price']) for p in prices] == expected
+    assert all(p['source'] == source for p in prices)
+
+
+def test_pick_texts_skip_contains_and_pick():
+    field = {'skip': 1, 'contains': '円'}
+    texts = ['iPhone 15 128GB', '-', '98,000円', '80,000円']
+
+    assert BaseScraper._pick_texts(field, texts, 'all') == [(1, '98,000円'), (2, '80,000円')]
+    assert BaseScraper._pick_texts(dict(field, pick='first'), texts, 'all') == [(1, '98,000円')]
+    assert BaseScraper._pick_texts(dict(field, pick='last'), texts, 'all') == [(2, '80,000円')]
+    assert BaseScraper._pick_texts({'contains': 'Android'}, texts, 'first') == []
+
+
+def test_condition_by_position_then_default():
+    field = {'conditions': ['未使用品'], 'condition': '中古品'}
+
+    assert BaseScraper._condition(field, 0) == '未使用品'
+    assert BaseScraper._condition(field, 1) == '中古品'
+    assert BaseScraper._condition({}, 0) is None